@@ -0,0 +1,88 @@
+"""Digits and units of Japanese numerals, shared by `jittok.jptext` and `jittok.jpdatetime`.
+
+Only the standard library is imported here, so that `jittok.jpdatetime` does not load `jittok.jptext`.
+"""
+from typing import Dict, Optional, Tuple
+
+small_numeral_units = {"千": 3, "百": 2, "十": 1}
+
+trans_map = str.maketrans(
+    {
+        "１": "1",
+        "２": "2",
+        "３": "3",
+        "４": "4",
+        "５": "5",
+        "６": "6",
+        "７": "7",
+        "８": "8",
+        "９": "9",
+        "０": "0",
+        "一": "1",
+        "二": "2",
+        "三": "3",
+        "四": "4",
+        "五": "5",
+        "六": "6",
+        "七": "7",
+        "八": "8",
+        "九": "9",
+        "〇": "0",
+        "壱": "1",
+        "弐": "2",
+        "参": "3",
+        "零": "0",
+    }
+)
+
+
+def split_sen_digits(x: str) -> Optional[Dict[int, Tuple[str, str]]]:
+    """Split a number below 万 such as `"1,423千10,320十"` or `"2千3百"` into numbers by their place.
+
+    A unit without a number before it, as in `"千"`, has the number `("1", "")`. Returns `None` if 千, 百 and 十 are
+    not strictly decreasing or a number between them is malformed.
+    """
+    terms: Dict[int, Tuple[str, str]] = {}
+    last_place = len(small_numeral_units) + 1
+    term_start = 0
+    for i, c in enumerate(x):
+        place = small_numeral_units.get(c)
+        if place is None:
+            continue
+        if place >= last_place:
+            return None
+        last_place = place
+        if i == term_start:
+            terms[place] = ("1", "")
+        else:
+            number = split_basic_number(x[term_start:i])
+            if number is None:
+                return None
+            terms[place] = number
+        term_start = i + 1
+    if term_start < len(x):
+        number = split_basic_number(x[term_start:])
+        if number is None:
+            return None
+        terms[0] = number
+    return terms
+
+
+def split_basic_number(x: str) -> Optional[Tuple[str, str]]:
+    """Split digits with optional thousands separators and decimal places, such as `"1,234.5"` or `".5"`.
+
+    Returns the integer part without separators and the decimal places, or `None` if `x` is malformed.
+    """
+    integer, dot, fraction = x.partition(".")
+    if len(dot) > 0 and not fraction.isdigit():
+        return None
+    if "," in integer:
+        head, *tail = integer.split(",")
+        if len(head) > 3 or not (len(head) == 0 or head.isdigit()):
+            return None
+        if any(len(t) != 3 or not t.isdigit() for t in tail):
+            return None
+        integer = "".join([head, *tail])
+    elif len(integer) > 0 and not integer.isdigit():
+        return None
+    return integer, fraction
@@ -1,3 +1,15 @@
-from .core import open_zipfile, save_resource_from_http_request_in_temporary_file
+from .core import (
+    copy_stream,
+    default_cache_dir,
+    fetch_cached_resource,
+    open_zipfile,
+    save_resource_from_http_request_in_temporary_file,
+)
 
-__all__ = ["open_zipfile", "save_resource_from_http_request_in_temporary_file"]
+__all__ = [
+    "copy_stream",
+    "default_cache_dir",
+    "fetch_cached_resource",
+    "open_zipfile",
+    "save_resource_from_http_request_in_temporary_file",
+]
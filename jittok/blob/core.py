@@ -1,9 +1,15 @@
+import hashlib
+import json
+import os
 import sys
 import zipfile
 from contextlib import contextmanager
 from tempfile import NamedTemporaryFile
-from typing import IO
-from urllib.request import urlopen
+from typing import IO, Callable, Dict, Optional
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from .exceptions import ChecksumMismatchError, ResourceNotCachedError
 
 if sys.version_info >= (3, 9):
     from collections.abc import Generator
@@ -11,9 +17,60 @@ else:
     from typing import Generator
 
 
+def default_cache_dir() -> str:
+    """Return the directory where jittok caches downloaded and derived resources.
+
+    `JITTOK_CACHE_DIR` takes precedence, then `$XDG_CACHE_HOME/jittok`, then `~/.cache/jittok`.
+
+    Returns:
+        str: Path to the cache directory. It may not exist yet.
+    """
+    cache_dir = os.environ.get("JITTOK_CACHE_DIR")
+    if cache_dir:
+        return cache_dir
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "jittok")
+
+
+default_buffer_size = 1 << 16
+
+
+def copy_stream(
+    src: IO[bytes], dst: IO[bytes], buffer_size: int = default_buffer_size, hash_name: Optional[str] = None
+) -> Optional[str]:
+    """Copy a byte stream chunk by chunk, optionally hashing what is copied.
+
+    Args:
+        src (IO[bytes]): Source.
+        dst (IO[bytes]): Destination.
+        buffer_size (int): Size of each chunk.
+        hash_name (Optional[str]): Name of a `hashlib` algorithm.
+
+    Returns:
+        Optional[str]: Hex digest of the copied bytes if `hash_name` is given.
+
+    >>> from io import BytesIO
+    >>> dst = BytesIO()
+    >>> copy_stream(BytesIO(b"abc"), dst, buffer_size=2, hash_name="md5")
+    '900150983cd24fb0d6963f7d28e17f72'
+    >>> dst.getvalue()
+    b'abc'
+    """
+    h = hashlib.new(hash_name) if hash_name is not None else None
+    while True:
+        chunk = src.read(buffer_size)
+        if not chunk:
+            break
+        if h is not None:
+            h.update(chunk)
+        dst.write(chunk)
+    return h.hexdigest() if h is not None else None
+
+
 def open_zipfile(zipfile_path: str, filename: str) -> IO[bytes]:
     """Open a file in a zip file.
 
+    The file is decompressed as it is read, and the zip file stays open until the returned file object is closed.
+
     Args:
         zipfile_path (str): Path to the zip file.
         filename (str): Name of the file to open.
@@ -26,18 +83,110 @@ def open_zipfile(zipfile_path: str, filename: str) -> IO[bytes]:
 
 
 @contextmanager
-def save_resource_from_http_request_in_temporary_file(url: str) -> Generator[IO[bytes], None, None]:
+def save_resource_from_http_request_in_temporary_file(
+    url: str, buffer_size: int = default_buffer_size, checksum: Optional[str] = None, hash_name: str = "sha256"
+) -> Generator[IO[bytes], None, None]:
     """Save a resource from an HTTP request in a temporary file.
 
+    The response is copied chunk by chunk, so memory usage does not depend on the size of the resource.
+
     Args:
         url (str): URL.
+        buffer_size (int): Size of each chunk.
+        checksum (Optional[str]): Expected hex digest of the resource. It is not verified if omitted.
+        hash_name (str): Name of the `hashlib` algorithm of `checksum`.
 
     Returns:
         IO[bytes]: File object.
+
+    Raises:
+        ChecksumMismatchError: The digest of the resource does not match `checksum`.
     """
 
     with NamedTemporaryFile() as tmp:
         with urlopen(url) as res:
-            tmp.write(res.read())
+            digest = copy_stream(res, tmp, buffer_size, hash_name if checksum is not None else None)
+        if checksum is not None and digest != checksum.lower():
+            raise ChecksumMismatchError(f"{hash_name} digest of {url} is {digest}, expected {checksum}")
         tmp.seek(0)
         yield tmp
+
+
+def fetch_cached_resource(
+    url: str, cache_dir: Optional[str] = None, offline: bool = False, buffer_size: int = default_buffer_size
+) -> str:
+    """Fetch a resource over HTTP into a local cache and return the path to the cached copy.
+
+    The body is stored along with its `ETag` and `Last-Modified` validators. Later calls send them back as
+    `If-None-Match` and `If-Modified-Since`, and reuse the cached copy when the server answers 304 Not Modified or
+    cannot be reached.
+
+    Args:
+        url (str): URL.
+        cache_dir (Optional[str]): Cache directory. `default_cache_dir()` is used if omitted.
+        offline (bool): Return the cached copy without accessing the network.
+        buffer_size (int): Size of each chunk copied from the response.
+
+    Returns:
+        str: Path to the cached copy of the resource.
+
+    Raises:
+        ResourceNotCachedError: `offline` is set and the resource is not cached.
+    """
+    root = os.path.join(cache_dir if cache_dir is not None else default_cache_dir(), "http")
+    body_path = os.path.join(root, hashlib.sha256(url.encode("utf-8")).hexdigest())
+    meta_path = f"{body_path}.json"
+    meta: Dict[str, str] = {}
+    if os.path.exists(body_path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as fin:
+                meta = json.load(fin)
+        except (OSError, ValueError):
+            meta = {}
+    elif offline:
+        raise ResourceNotCachedError(f"Not cached: {url}")
+    if offline:
+        return body_path
+    headers = {}
+    if "etag" in meta:
+        headers["If-None-Match"] = meta["etag"]
+    if "last_modified" in meta:
+        headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        with urlopen(Request(url, headers=headers)) as res:
+            os.makedirs(root, exist_ok=True)
+            _write_atomically(body_path, lambda f: copy_stream(res, f, buffer_size))
+            meta = {"url": url}
+            if res.headers.get("ETag") is not None:
+                meta["etag"] = res.headers["ETag"]
+            if res.headers.get("Last-Modified") is not None:
+                meta["last_modified"] = res.headers["Last-Modified"]
+    except HTTPError as e:
+        if e.code != 304 or not os.path.exists(body_path):
+            raise
+        return body_path
+    except URLError:
+        if not os.path.exists(body_path):
+            raise
+        return body_path
+    _write_atomically(meta_path, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+    return body_path
+
+
+def _write_atomically(path: str, write: Callable[[IO[bytes]], object]) -> None:
+    with NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as tmp:
+        try:
+            write(tmp)
+            tmp.close()
+            # NamedTemporaryFile creates the file with mode 0600; give it the mode `open` would have.
+            os.chmod(tmp.name, 0o666 & ~_umask())
+            os.replace(tmp.name, path)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+
+
+def _umask() -> int:
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
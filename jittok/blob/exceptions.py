@@ -0,0 +1,13 @@
+from ..exceptions import BaseError
+
+
+class BaseBlobError(BaseError):
+    ...
+
+
+class ChecksumMismatchError(BaseBlobError, ValueError):
+    ...
+
+
+class ResourceNotCachedError(BaseBlobError, FileNotFoundError):
+    ...
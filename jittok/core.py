@@ -1,5 +1,16 @@
+import sys
+import typing
 from abc import ABCMeta, abstractmethod
-from typing import Generic, TypeVar
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Generic, TypeVar
+
+if sys.version_info >= (3, 9):
+    from collections.abc import Generator, Iterable
+else:
+    from typing import Generator, Iterable
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
 S = TypeVar("S")
 T = TypeVar("T")
@@ -9,3 +20,29 @@ class Callable(Generic[S, T], metaclass=ABCMeta):
     @abstractmethod
     def __call__(self, args: S) -> T:
         ...
+
+
+def map_in_processes(fn: typing.Callable[[S], T], items: Iterable[S], workers: int) -> Generator[T, None, None]:
+    """Apply a function to items on a process pool, yielding the results in order.
+
+    Items are consumed lazily, with at most two items per worker in flight.
+
+    Args:
+        fn (typing.Callable[[S], T]): Picklable function.
+        items (Iterable[S]): Picklable items.
+        workers (int): Number of worker processes.
+
+    Returns:
+        Generator[T, None, None]: Results in the order of the items.
+    """
+    # Imported here as it pulls in multiprocessing, which is not needed otherwise.
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: "Deque[Future[T]]" = deque()
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -1,3 +1,21 @@
-from .core import Address, AddressLookup, zipcode_to_address
+from .core import (
+    Address,
+    AddressLookup,
+    AddressSearchIndex,
+    MappedAddressLookup,
+    normalize_zipcode,
+    zipcode_to_address,
+    zipcodes_to_address_columns,
+    zipcodes_to_addresses,
+)
 
-__all__ = ["zipcode_to_address", "Address", "AddressLookup"]
+__all__ = [
+    "zipcode_to_address",
+    "zipcodes_to_addresses",
+    "zipcodes_to_address_columns",
+    "normalize_zipcode",
+    "Address",
+    "AddressLookup",
+    "AddressSearchIndex",
+    "MappedAddressLookup",
+]
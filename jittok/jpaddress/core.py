@@ -1,26 +1,81 @@
-import codecs
 import csv
+import mmap
+import os
+import struct
 import sys
-from dataclasses import dataclass
-from typing import Dict, Optional
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from dataclasses import dataclass, fields
+from heapq import heapify, heappop
+from itertools import islice
+from operator import attrgetter
+from typing import (
+    IO,
+    Any,
+    Callable,
+    DefaultDict,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from .. import jptext
-from ..blob import open_zipfile, save_resource_from_http_request_in_temporary_file
-from .exceptions import ZipcodeNotFoundError
+from ..blob import (
+    default_cache_dir,
+    fetch_cached_resource,
+    open_zipfile,
+    save_resource_from_http_request_in_temporary_file,
+)
+from ..blob.core import _write_atomically
+from ..core import map_in_processes
+from .exceptions import SnapshotFormatError, ZipcodeNotFoundError
 
 if sys.version_info >= (3, 9):
-    from collections.abc import Generator, Iterable
+    from collections.abc import Generator, Iterable, Iterator, Mapping
 else:
-    from typing import Generator, Iterable
+    from typing import Generator, Iterable, Iterator, Mapping
 
-import pykakasi
-
-kks = pykakasi.kakasi()
 address_lookup_cache: Optional["AddressLookup"] = None
+address_lookup_cache_dir: Optional[str] = None
+_address_lookup_cache_lock = threading.Lock()
+
+T = TypeVar("T", str, Tuple[int, str])
+
+_snapshot_magic = b"JTKADDR\x00"
+_snapshot_version = 3
+_snapshot_header = struct.Struct("<8sHIIIQ")
+_snapshot_uint32 = struct.Struct("<I")
+_snapshot_uint32_pair = struct.Struct("<2I")
+_japanpost_snapshot_filename = "ken_all_rome.jtkaddr"
+# Japan Post updates its zipcode data monthly, so a snapshot is rebuilt when it is older than a week.
+japanpost_snapshot_max_age = 7 * 24 * 60 * 60
 
 
 @dataclass(eq=True, frozen=True)
 class Address:
+    __slots__ = (
+        "zipcode",
+        "prefecture",
+        "city",
+        "town",
+        "prefecture_kana",
+        "city_kana",
+        "town_kana",
+        "prefecture_kanji",
+        "city_kanji",
+        "town_kanji",
+        "prefecture_romaji",
+        "city_romaji",
+        "town_romaji",
+    )
+
     zipcode: str
     prefecture: str
     city: str
@@ -38,6 +93,68 @@ class Address:
     def __str__(self) -> str:
         return f"{self.prefecture} {self.city} {self.town}"
 
+    def __getstate__(self) -> Tuple[str, ...]:
+        return tuple(_address_field_getter(self))
+
+    def __setstate__(self, state: Tuple[str, ...]) -> None:
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, sys.intern(value) if name in _interned_address_fields else value)
+
+
+_address_field_getter = attrgetter(*(f.name for f in fields(Address)))
+_interned_address_fields = frozenset(
+    (
+        "prefecture",
+        "city",
+        "prefecture_kana",
+        "city_kana",
+        "prefecture_kanji",
+        "city_kanji",
+        "prefecture_romaji",
+        "city_romaji",
+    )
+)
+_snapshot_record = struct.Struct(f"<{len(fields(Address))}I")
+
+
+class _SnapshotLayout(NamedTuple):
+    string_count: int
+    record_count: int
+    offsets_offset: int
+    pool_offset: int
+    records_offset: int
+    built_at: int
+
+
+def _parse_snapshot_layout(buf: Union[bytes, mmap.mmap], path: str) -> _SnapshotLayout:
+    """Validate the header of a snapshot and locate its sections.
+
+    A snapshot is laid out as follows (all integers are little-endian uint32 unless noted):
+
+    - header: magic (8 bytes), format version (uint16), string count, record count, pool size and the time the
+      snapshot was saved in seconds since the epoch (uint64)
+    - string offsets: `string count + 1` offsets into the pool
+    - string pool: UTF-8 encoded strings, each terminated by NUL
+    - records: one row of string indices per address in field order, sorted by zipcode
+    """
+    if len(buf) < _snapshot_header.size:
+        raise SnapshotFormatError(f"Truncated snapshot: {path}")
+    magic, version, string_count, record_count, pool_size, built_at = _snapshot_header.unpack_from(buf)
+    if magic != _snapshot_magic:
+        raise SnapshotFormatError(f"Not an address snapshot: {path}")
+    if version != _snapshot_version:
+        raise SnapshotFormatError(f"Unsupported snapshot version {version}: {path}")
+    offsets_offset = _snapshot_header.size
+    pool_offset = offsets_offset + (string_count + 1) * _snapshot_uint32.size
+    records_offset = pool_offset + pool_size
+    if len(buf) != records_offset + record_count * _snapshot_record.size:
+        raise SnapshotFormatError(f"Truncated snapshot: {path}")
+    return _SnapshotLayout(string_count, record_count, offsets_offset, pool_offset, records_offset, built_at)
+
+
+def _is_fresh(built_at: int, max_age: Optional[float]) -> bool:
+    return max_age is None or time.time() - built_at <= max_age
+
 
 def zipcode_to_address(zipcode: str) -> Address:
     """Convert a zipcode to an address.
@@ -57,11 +174,101 @@ def zipcode_to_address(zipcode: str) -> Address:
     ...     zipcode_to_address("1000001")
     Address(zipcode='1000001', prefecture='東京都', city='千代田区', town='千代田', prefecture_kana='トウキョウト', city_kana='チヨダク', town_kana='チヨダ', prefecture_kanji='東京都', city_kanji='千代田区', town_kanji='千代田', prefecture_romaji='Tokyo-to', city_romaji='Chiyoda-ku', town_romaji='Chiyoda')
     """  # noqa: E501
+    retval = _get_address_lookup_cache()[zipcode]
+    return retval
+
+
+def _get_address_lookup_cache() -> "AddressLookup":
+    """Return the address table, loading it on first use. Concurrent first calls load it only once."""
     global address_lookup_cache
     if address_lookup_cache is None:
-        address_lookup_cache = AddressLookup()
-    retval = address_lookup_cache[zipcode]
-    return retval
+        with _address_lookup_cache_lock:
+            if address_lookup_cache is None:
+                address_lookup_cache = AddressLookup.from_cached_japanpost_zipfile(address_lookup_cache_dir)
+    return address_lookup_cache
+
+
+_zipcode_trans_map = str.maketrans(
+    {
+        **{chr(ord("０") + i): str(i) for i in range(10)},
+        **{c: None for c in "〒-－‐‑–—−ー \u3000"},
+    }
+)
+
+
+def normalize_zipcode(zipcode: str) -> str:
+    """Normalize a zipcode written by hand into 7 ASCII digits.
+
+    Full-width digits are converted into ASCII ones and the postal mark, hyphens and spaces are removed.
+
+    Args:
+        zipcode (str): Zipcode.
+
+    Returns:
+        str: Normalized zipcode.
+
+    >>> normalize_zipcode("〒１００－０００１")
+    '1000001'
+    >>> normalize_zipcode(" 100-0001 ")
+    '1000001'
+    """
+    return zipcode.translate(_zipcode_trans_map)
+
+
+def zipcodes_to_addresses(
+    zipcodes: Iterable[str], on_missing: str = "none"
+) -> Generator[Optional[Address], None, None]:
+    """Convert zipcodes to addresses in bulk.
+
+    Zipcodes are normalized with `normalize_zipcode` and each distinct zipcode is looked up only once.
+
+    Args:
+        zipcodes (Iterable[str]): Zipcodes.
+        on_missing (str): `"none"` to yield `None` for unknown zipcodes, or `"raise"` to raise an error.
+
+    Returns:
+        Generator[Optional[Address], None, None]: Addresses in the same order as the zipcodes.
+
+    Raises:
+        ValueError: Invalid `on_missing`.
+        ZipcodeNotFoundError: Unknown zipcode while `on_missing` is `"raise"`.
+    """
+    if on_missing not in ("none", "raise"):
+        raise ValueError(f"on_missing must be 'none' or 'raise', not '{on_missing}'")
+    return _zipcodes_to_addresses(zipcodes, on_missing)
+
+
+def _zipcodes_to_addresses(zipcodes: Iterable[str], on_missing: str) -> Generator[Optional[Address], None, None]:
+    lookup = _get_address_lookup_cache()
+    memo: Dict[str, Optional[Address]] = {}
+    for zipcode in zipcodes:
+        if zipcode in memo:
+            retval = memo[zipcode]
+        else:
+            retval = memo[zipcode] = lookup.get(normalize_zipcode(zipcode))
+        if retval is None and on_missing == "raise":
+            raise ZipcodeNotFoundError(f"Invalid zipcode: {zipcode}")
+        yield retval
+
+
+def zipcodes_to_address_columns(zipcodes: Iterable[str], on_missing: str = "none") -> Dict[str, List[Optional[str]]]:
+    """Convert zipcodes to addresses in bulk and return them column by column.
+
+    Args:
+        zipcodes (Iterable[str]): Zipcodes.
+        on_missing (str): `"none"` to fill `None` for unknown zipcodes, or `"raise"` to raise an error.
+
+    Returns:
+        Dict[str, List[Optional[str]]]: Lists of the values of each `Address` field, in the same order as the zipcodes.
+
+    Raises:
+        ValueError: Invalid `on_missing`.
+        ZipcodeNotFoundError: Unknown zipcode while `on_missing` is `"raise"`.
+    """
+    names = [f.name for f in fields(Address)]
+    missing = (None,) * len(names)
+    rows = [missing if a is None else _address_field_getter(a) for a in zipcodes_to_addresses(zipcodes, on_missing)]
+    return {name: list(column) for name, column in zip(names, zip(*rows))} if rows else {name: [] for name in names}
 
 
 def _tidy_romaji_name(name: str) -> str:
@@ -92,7 +299,188 @@ def _tidy_romaji_name(name: str) -> str:
     return retval.strip()
 
 
+_search_fields = (
+    attrgetter("prefecture", "prefecture_kana", "prefecture_romaji"),
+    attrgetter("city", "city_kana", "city_romaji"),
+    attrgetter("town", "town_kana", "town_romaji"),
+)
+
+
+def _ngrams(x: str) -> Set[str]:
+    """Return the character unigrams and bigrams of a string.
+
+    >>> sorted(_ngrams("東京都"))
+    ['京', '京都', '東', '東京', '都']
+    """
+    return set(x) | {x[i : i + 2] for i in range(len(x) - 1)}  # noqa: E203
+
+
+def _in_order(items: Iterable[T]) -> Generator[T, None, None]:
+    """Yield items in ascending order, sorting only as far as they are consumed."""
+    heap = list(items)
+    heapify(heap)
+    while heap:
+        yield heappop(heap)
+
+
+class AddressSearchIndex:
+    """Inverted index from character unigrams and bigrams to the prefecture, city and town names of addresses.
+
+    Kanji, kana and romaji names are indexed case-insensitively. Names are shared between addresses, so the n-grams
+    point to distinct names and each name points to the zipcodes that use it. Names are also indexed by their first one
+    and two characters, so that short search words find the names they start with directly.
+
+    >>> index = AddressSearchIndex()
+    >>> index.add(Address("1000001", "東京都", "千代田区", "千代田", "トウキョウト", "チヨダク", "チヨダ", "東京都", "千代田区", "千代田", "Tokyo-to", "Chiyoda-ku", "Chiyoda"))
+    >>> index.add(Address("1000004", "東京都", "千代田区", "大手町", "トウキョウト", "チヨダク", "オオテマチ", "東京都", "千代田区", "大手町", "Tokyo-to", "Chiyoda-ku", "Otemachi"))
+    >>> list(index.search("千代田"))
+    ['1000001', '1000004']
+    >>> list(index.search("otemachi"))
+    ['1000004']
+    """  # noqa: E501
+
+    def __init__(self) -> None:
+        self._ngrams: DefaultDict[str, Set[Tuple[int, str]]] = defaultdict(set)
+        self._prefixes: DefaultDict[str, Set[Tuple[int, str]]] = defaultdict(set)
+        self._names: Dict[Tuple[int, str], Set[str]] = {}
+
+    @staticmethod
+    def _names_of(address: Address) -> Set[Tuple[int, str]]:
+        return {(level, n.casefold()) for level, f in enumerate(_search_fields) for n in f(address) if n}
+
+    def add(self, address: Address) -> None:
+        """Index an address."""
+        for name in self._names_of(address):
+            zipcodes = self._names.get(name)
+            if zipcodes is None:
+                zipcodes = self._names[name] = set()
+                for g in _ngrams(name[1]):
+                    self._ngrams[g].add(name)
+                for g in {name[1][:1], name[1][:2]}:
+                    self._prefixes[g].add(name)
+            zipcodes.add(address.zipcode)
+
+    def discard(self, address: Address) -> None:
+        """Remove an address from the index if it is indexed."""
+        for name in self._names_of(address):
+            zipcodes = self._names.get(name)
+            if zipcodes is None:
+                continue
+            zipcodes.discard(address.zipcode)
+            if len(zipcodes) == 0:
+                del self._names[name]
+                for g in _ngrams(name[1]):
+                    _discard_posting(self._ngrams, g, name)
+                for g in {name[1][:1], name[1][:2]}:
+                    _discard_posting(self._prefixes, g, name)
+
+    def search(self, search_word: str) -> Generator[str, None, None]:
+        """Yield the zipcodes of addresses whose names contain the search word, best matches first.
+
+        Addresses with a name equal to the search word come first, then those with a name starting with it, then the
+        rest. Ties are broken by prefecture, city and town level in this order, and then by zipcode. Matches are ranked
+        lazily, so taking the first few of them costs little even for a search word matching many names.
+
+        Args:
+            search_word (str): Search word. It must not be empty.
+
+        Returns:
+            Generator[str, None, None]: Zipcodes.
+        """
+        word = search_word.casefold()
+        if len(word) <= 2:
+            names = self._ngrams.get(word, set())
+            prefixed = self._prefixes.get(word, set())
+        else:
+            postings = sorted((self._ngrams.get(g, set()) for g in _ngrams(word) if len(g) == 2), key=len)
+            names = {n for n in postings[0].intersection(*postings[1:]) if word in n[1]}
+            prefixed = {n for n in names if n[1].startswith(word)}
+        seen: Set[str] = set()
+        for name in [(level, word) for level in range(len(_search_fields)) if (level, word) in self._names]:
+            yield from self._unseen_zipcodes(name, seen)
+        for name in _in_order(prefixed):
+            if name[1] != word:
+                yield from self._unseen_zipcodes(name, seen)
+        for name in _in_order(names):
+            if not name[1].startswith(word):
+                yield from self._unseen_zipcodes(name, seen)
+
+    def _unseen_zipcodes(self, name: Tuple[int, str], seen: Set[str]) -> Generator[str, None, None]:
+        for zipcode in _in_order(self._names[name]):
+            if zipcode not in seen:
+                seen.add(zipcode)
+                yield zipcode
+
+
+def _discard_posting(postings: DefaultDict[str, Set[Tuple[int, str]]], key: str, name: Tuple[int, str]) -> None:
+    names = postings[key]
+    names.discard(name)
+    if len(names) == 0:
+        del postings[key]
+
+
+def _prefix_range(zipcodes: Union[List[str], "_ZipcodeColumn"], zip_prefix: str) -> Tuple[int, int]:
+    """Return the range of sorted zipcodes which start with the prefix.
+
+    >>> _prefix_range(["0600000", "0600041", "0640941", "1000001"], "060")
+    (0, 2)
+    >>> _prefix_range(["0600000", "0600041", "0640941", "1000001"], "2")
+    (4, 4)
+    """
+    if len(zip_prefix) == 0:
+        return 0, len(zipcodes)
+    upper = zip_prefix[:-1] + chr(ord(zip_prefix[-1]) + 1)
+    return bisect_left(zipcodes, zip_prefix), bisect_left(zipcodes, upper)
+
+
+def _chunked(rows: Iterable[List[str]], size: int) -> Generator[List[List[str]], None, None]:
+    it = iter(rows)
+    chunk = list(islice(it, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(it, size))
+
+
+def _address_from_csv_row(d: List[str]) -> Address:
+    zip_code_idx = 0
+    prefecture_idx = 1
+    city_idx = 2
+    town_idx = 3
+    a_prefecture_idx = 4
+    a_city_idx = 5
+    a_town_idx = 6
+    # Prefecture and city names repeat across rows, so they are interned to share one string object per name.
+    prefecture_kanji = sys.intern(jptext.normalize(d[prefecture_idx]).replace(" ", ""))
+    city_kanji = sys.intern(jptext.normalize(d[city_idx]).replace(" ", ""))
+    town_kanji = jptext.normalize(d[town_idx]).replace(" ", "") if d[town_idx] != "以下に掲載がない場合" else ""
+    a_prefecture_raw = d[a_prefecture_idx]
+    a_city_raw = d[a_city_idx]
+    a_town_raw = d[a_town_idx] if d[a_town_idx] != "IKANIKEISAIGANAIBAAI" else ""
+    return Address(
+        zipcode=d[zip_code_idx],
+        prefecture=prefecture_kanji,
+        city=city_kanji,
+        town=town_kanji,
+        prefecture_kana=sys.intern(jptext.cached_kanji_to_kana(prefecture_kanji)),
+        city_kana=sys.intern(jptext.cached_kanji_to_kana(city_kanji)),
+        town_kana=jptext.cached_kanji_to_kana(town_kanji),
+        prefecture_kanji=prefecture_kanji,
+        city_kanji=city_kanji,
+        town_kanji=town_kanji,
+        prefecture_romaji=sys.intern(_tidy_romaji_name(a_prefecture_raw)),
+        city_romaji=sys.intern(_tidy_romaji_name(a_city_raw)),
+        town_romaji=_tidy_romaji_name(a_town_raw),
+    )
+
+
+def _addresses_from_csv_rows(rows: List[List[str]]) -> List[Address]:
+    return [_address_from_csv_row(d) for d in rows]
+
+
 class AddressLookup(Dict[str, Address]):
+    _search_index: Optional[AddressSearchIndex] = None
+    _sorted_zipcodes: Optional[List[str]] = None
+
     def __init__(self, data: Optional[Iterable[Address]] = None) -> None:
         if data is None:
             super(AddressLookup, self).__init__(self.from_japanpost_zipfile().items())
@@ -102,53 +490,190 @@ class AddressLookup(Dict[str, Address]):
     def __missing__(self, key: str) -> Address:
         raise ZipcodeNotFoundError(f"Invalid zipcode: {key}")
 
-    def search(self, search_word: str) -> Generator[Address, None, None]:
-        for v in self.values():
-            if search_word in v.prefecture or search_word in v.city or search_word in v.town:
-                yield v
+    def __setitem__(self, key: str, value: Address) -> None:
+        key = key.replace("-", "")
+        if self._search_index is not None:
+            if key in self:
+                self._search_index.discard(super(AddressLookup, self).__getitem__(key))
+            self._search_index.add(value)
+        if self._sorted_zipcodes is not None and key not in self:
+            insort(self._sorted_zipcodes, key)
+        super(AddressLookup, self).__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        key = key.replace("-", "")
+        if key in self:
+            self._unindex(key, super(AddressLookup, self).__getitem__(key))
+        super(AddressLookup, self).__delitem__(key)
+
+    def _unindex(self, key: str, value: Address) -> None:
+        if self._search_index is not None:
+            self._search_index.discard(value)
+        if self._sorted_zipcodes is not None:
+            del self._sorted_zipcodes[bisect_left(self._sorted_zipcodes, key)]
+
+    # The other methods which modify the dictionary go through `__setitem__` and `__delitem__` as well, so that the
+    # search index and the sorted zipcodes are kept up to date and hyphens are removed from the zipcodes.
+
+    def update(self, *args: Any, **kwargs: Address) -> None:
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    if sys.version_info >= (3, 9):
+
+        def __ior__(self, other: Any) -> "AddressLookup":  # type: ignore[override,misc]
+            self.update(other)
+            return self
+
+    def setdefault(self, key: str, default: Address) -> Address:
+        key = key.replace("-", "")
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key: str, *args: Any) -> Any:
+        key = key.replace("-", "")
+        if key in self:
+            retval = super(AddressLookup, self).__getitem__(key)
+            del self[key]
+            return retval
+        if args:
+            return args[0]
+        raise KeyError(key)
+
+    def popitem(self) -> Tuple[str, Address]:
+        key, value = super(AddressLookup, self).popitem()
+        self._unindex(key, value)
+        return key, value
+
+    def clear(self) -> None:
+        super(AddressLookup, self).clear()
+        self._search_index = None
+        self._sorted_zipcodes = None
+
+    @property
+    def sorted_zipcodes(self) -> List[str]:
+        """Zipcodes in ascending order, used by `prefix_search`.
+
+        It is built on first access and kept up to date when the lookup is modified afterwards.
+        Interactive callers can access it right after loading the lookup so that the build does not delay the
+        first search.
+        """
+        if self._sorted_zipcodes is None:
+            self._sorted_zipcodes = sorted(self)
+        return self._sorted_zipcodes
+
+    def prefix_search(self, zip_prefix: str) -> List[Address]:
+        """Return the addresses whose zipcodes start with the prefix, in zipcode order.
+
+        Args:
+            zip_prefix (str): Leading digits of zipcodes. Hyphens are ignored.
+
+        Returns:
+            List[Address]: Matched addresses.
+        """
+        start, stop = _prefix_range(self.sorted_zipcodes, zip_prefix.replace("-", ""))
+        return [super(AddressLookup, self).__getitem__(k) for k in self.sorted_zipcodes[start:stop]]
+
+    def iter_prefix_search(self, zip_prefix: str) -> Generator[Address, None, None]:
+        """Yield the addresses whose zipcodes start with the prefix, in zipcode order.
+
+        Unlike `prefix_search`, addresses are looked up one by one, which suits short prefixes matching many of them.
+
+        Args:
+            zip_prefix (str): Leading digits of zipcodes. Hyphens are ignored.
+
+        Returns:
+            Generator[Address, None, None]: Matched addresses.
+        """
+        start, stop = _prefix_range(self.sorted_zipcodes, zip_prefix.replace("-", ""))
+        for i in range(start, stop):
+            yield super(AddressLookup, self).__getitem__(self.sorted_zipcodes[i])
+
+    @property
+    def search_index(self) -> AddressSearchIndex:
+        """N-gram index used by `search`.
+
+        It is built on first access and kept up to date when the lookup is modified afterwards.
+        """
+        if self._search_index is None:
+            index = AddressSearchIndex()
+            for v in self.values():
+                index.add(v)
+            self._search_index = index
+        return self._search_index
+
+    def search(self, search_word: str, limit: Optional[int] = None, offset: int = 0) -> Generator[Address, None, None]:
+        """Search addresses by a part of their prefecture, city or town name in kanji, kana or romaji.
+
+        Args:
+            search_word (str): Search word. Romaji is matched case-insensitively.
+            limit (Optional[int]): Maximum number of addresses to yield.
+            offset (int): Number of addresses to skip, for pagination.
+
+        Returns:
+            Generator[Address, None, None]: Matched addresses, best matches first.
+        """
+        zipcodes = iter(self) if len(search_word) == 0 else self.search_index.search(search_word)
+        stop = None if limit is None else offset + limit
+        for zipcode in islice(zipcodes, offset, stop):
+            yield super(AddressLookup, self).__getitem__(zipcode)
 
     @classmethod
-    def from_csv_string_iterable(cls, readable: Iterable[str]) -> "AddressLookup":
-        """Initialize AddressLookup class from a string iterable."""
+    def from_csv_string_iterable(
+        cls,
+        readable: Iterable[str],
+        workers: Optional[int] = None,
+        chunk_size: int = 5000,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> "AddressLookup":
+        """Initialize AddressLookup class from a string iterable.
+
+        Args:
+            readable (Iterable[str]): Lines of a CSV file in the format of Japan Post's romaji zipcode data.
+            workers (Optional[int]): Number of worker processes. Rows are converted in the calling process if omitted
+                or 1; otherwise they are split into chunks converted on a process pool. The result is the same.
+            chunk_size (int): Number of rows per chunk.
+            progress (Optional[Callable[[int], None]]): Called with the number of rows converted so far after each
+                chunk.
+
+        Returns:
+            AddressLookup: Address lookup.
+        """
         retval = AddressLookup([])
-        zip_code_idx = 0
-        prefecture_idx = 1
-        city_idx = 2
-        town_idx = 3
-        a_prefecture_idx = 4
-        a_city_idx = 5
-        a_town_idx = 6
-        for d in csv.reader(readable):
-            prefecture_kanji = jptext.normalize(d[prefecture_idx]).replace(" ", "")
-            city_kanji = jptext.normalize(d[city_idx]).replace(" ", "")
-            town_kanji = jptext.normalize(d[town_idx]).replace(" ", "") if d[town_idx] != "以下に掲載がない場合" else ""
-            a_prefecture_raw = d[a_prefecture_idx]
-            a_city_raw = d[a_city_idx]
-            a_town_raw = d[a_town_idx] if d[a_town_idx] != "IKANIKEISAIGANAIBAAI" else ""
-            retval[d[zip_code_idx]] = Address(
-                zipcode=d[zip_code_idx],
-                prefecture=prefecture_kanji,
-                city=city_kanji,
-                town=town_kanji,
-                prefecture_kana=jptext.kanji_to_kana(prefecture_kanji),
-                city_kana=jptext.kanji_to_kana(city_kanji),
-                town_kana=jptext.kanji_to_kana(town_kanji),
-                prefecture_kanji=prefecture_kanji,
-                city_kanji=city_kanji,
-                town_kanji=town_kanji,
-                prefecture_romaji=_tidy_romaji_name(a_prefecture_raw),
-                city_romaji=_tidy_romaji_name(a_city_raw),
-                town_romaji=_tidy_romaji_name(a_town_raw),
-            )
+        done = 0
+
+        def merge(addresses: List[Address]) -> None:
+            nonlocal done
+            for a in addresses:
+                retval[a.zipcode] = a
+            done += len(addresses)
+            if progress is not None:
+                progress(done)
+
+        chunks = _chunked(csv.reader(readable), chunk_size)
+        if workers is None or workers <= 1:
+            for rows in chunks:
+                merge(_addresses_from_csv_rows(rows))
+            return retval
+        for addresses in map_in_processes(_addresses_from_csv_rows, chunks, workers):
+            merge(addresses)
         return retval
 
     @classmethod
     def from_csv_local_zipfile(
         cls, zipfile_path: str, filename_in_zipfile: str, encoding: Optional[str] = None
     ) -> "AddressLookup":
-        """Initialize AddressLookup class from a CSV file in a ZIP file."""
+        """Initialize AddressLookup class from a CSV file in a ZIP file.
+
+        The file is decoded as it is read, in `encoding`, which is UTF-8 if omitted. If `encoding` is `"auto"`, it is
+        guessed from the beginning of the file as in `jittok.jptext.detect_encoding`.
+        """
+        if encoding is None:
+            encoding = "utf-8"
         with open_zipfile(zipfile_path, filename_in_zipfile) as f:
-            return cls.from_csv_string_iterable(codecs.getreader(encoding if encoding is not None else "utf-8")(f))
+            decoded = jptext.decode_stream(f, encoding=None if encoding == "auto" else encoding)
+            return cls.from_csv_string_iterable(jptext.split_lines(decoded))
 
     @classmethod
     def from_csv_remote_zipfile(
@@ -159,11 +684,281 @@ class AddressLookup(Dict[str, Address]):
             return cls.from_csv_local_zipfile(f.name, filename_in_zipfile, encoding=encoding)
 
     @classmethod
-    def from_japanpost_zipfile(cls) -> "AddressLookup":
-        """Initialize AddressLookup class from a CSV file in a ZIP file."""
-        return cls.from_csv_remote_zipfile(
-            "https://www.post.japanpost.jp/zipcode/dl/roman/ken_all_rome.zip", "KEN_ALL_ROME.csv", encoding="CP932"
+    def from_csv_cached_remote_zipfile(
+        cls,
+        zipfile_url: str,
+        filename_in_zipfile: str,
+        encoding: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        offline: bool = False,
+    ) -> "AddressLookup":
+        """Initialize AddressLookup class from a CSV file in a ZIP file fetched through `jittok.blob`'s HTTP cache."""
+        path = fetch_cached_resource(zipfile_url, cache_dir, offline=offline)
+        return cls.from_csv_local_zipfile(path, filename_in_zipfile, encoding=encoding)
+
+    @classmethod
+    def from_japanpost_zipfile(cls, cache_dir: Optional[str] = None) -> "AddressLookup":
+        """Initialize AddressLookup class from Japan Post's ZIP file, which is downloaded only when it has changed.
+
+        Args:
+            cache_dir (Optional[str]): Cache directory for the ZIP file. `jittok.blob.default_cache_dir()` is used if
+                omitted.
+
+        Returns:
+            AddressLookup: Address lookup.
+        """
+        return cls.from_csv_cached_remote_zipfile(
+            "https://www.post.japanpost.jp/zipcode/dl/roman/ken_all_rome.zip",
+            "KEN_ALL_ROME.csv",
+            encoding="CP932",
+            cache_dir=cache_dir,
         )
 
+    @classmethod
+    def from_cached_japanpost_zipfile(
+        cls, cache_dir: Optional[str] = None, max_age: Optional[float] = japanpost_snapshot_max_age
+    ) -> "AddressLookup":
+        """Initialize AddressLookup class from a snapshot in the cache directory.
+
+        Falls back to `from_japanpost_zipfile` when the snapshot is missing, unreadable or older than `max_age`, and
+        stores the result as a snapshot so that the next process can skip downloading and transliterating the data.
+
+        Args:
+            cache_dir (Optional[str]): Cache directory. `jittok.blob.default_cache_dir()` is used if omitted.
+            max_age (Optional[float]): Maximum age of the snapshot in seconds. It never expires if `None`.
+
+        Returns:
+            AddressLookup: Address lookup.
+        """
+        path = os.path.join(cache_dir if cache_dir is not None else default_cache_dir(), _japanpost_snapshot_filename)
+        try:
+            built_at, retval = cls._load_snapshot(path)
+            if _is_fresh(built_at, max_age):
+                return retval
+        except (OSError, SnapshotFormatError):
+            ...
+        retval = cls.from_japanpost_zipfile(cache_dir=cache_dir)
+        try:
+            retval.save_snapshot(path)
+        except OSError:
+            ...
+        return retval
+
+    @classmethod
+    def load_snapshot(cls, path: str) -> "AddressLookup":
+        """Initialize AddressLookup class from a snapshot file written by `save_snapshot`.
+
+        Args:
+            path (str): Path to the snapshot file.
+
+        Returns:
+            AddressLookup: Address lookup.
+
+        Raises:
+            SnapshotFormatError: The file is not a snapshot, its format version is not supported or it is corrupted.
+        """
+        return cls._load_snapshot(path)[1]
+
+    @classmethod
+    def _load_snapshot(cls, path: str) -> Tuple[int, "AddressLookup"]:
+        with open(path, "rb") as fin:
+            buf = fin.read()
+        layout = _parse_snapshot_layout(buf, path)
+        pool_start, pool_end = layout.pool_offset, layout.records_offset
+        try:
+            strings = buf[pool_start:pool_end].decode("utf-8").split("\x00")[:-1]
+        except UnicodeDecodeError:
+            raise SnapshotFormatError(f"Broken string pool: {path}") from None
+        if len(strings) != layout.string_count:
+            raise SnapshotFormatError(f"Broken string pool: {path}")
+        width = len(fields(Address))
+        indices = struct.unpack_from(f"<{layout.record_count * width}I", buf, layout.records_offset)
+        if len(indices) > 0 and max(indices) >= layout.string_count:
+            raise SnapshotFormatError(f"Broken records: {path}")
+        columns = iter(map(strings.__getitem__, indices))
+        return layout.built_at, cls(Address(*row) for row in zip(*[columns] * width))
+
+    def save_snapshot(self, path: str) -> None:
+        """Save the lookup table as a versioned binary snapshot.
+
+        The snapshot consists of a header, a pool of distinct strings and a table of string indices, one row per
+        address sorted by zipcode, so that it can be either loaded at once with `load_snapshot` or mapped into memory
+        with `MappedAddressLookup`. The file is replaced atomically so that concurrent readers never see a partially
+        written snapshot.
+
+        Args:
+            path (str): Path to the snapshot file.
+        """
+        pool: Dict[str, int] = {}
+        indices: List[int] = []
+        for k in sorted(self):
+            indices.extend(pool.setdefault(s, len(pool)) for s in _address_field_getter(self[k]))
+        encoded = [f"{s}\x00".encode("utf-8") for s in pool]
+        offsets = [0]
+        for e in encoded:
+            offsets.append(offsets[-1] + len(e))
+        header = (_snapshot_magic, _snapshot_version, len(pool), len(self), offsets[-1], int(time.time()))
+
+        def write(f: IO[bytes]) -> None:
+            f.write(_snapshot_header.pack(*header))
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            f.write(b"".join(encoded))
+            f.write(struct.pack(f"<{len(indices)}I", *indices))
+
+        path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomically(path, write)
+
     def __getitem__(self, key: str) -> Address:
         return super(AddressLookup, self).__getitem__(key.replace("-", ""))
+
+
+class _ZipcodeColumn:
+    """Sequence view over the zipcode column of a mapped snapshot, for use with `bisect`."""
+
+    def __init__(self, lookup: "MappedAddressLookup") -> None:
+        self._lookup = lookup
+
+    def __len__(self) -> int:
+        return len(self._lookup)
+
+    def __getitem__(self, i: int) -> str:
+        return self._lookup._zipcode(i)
+
+
+class MappedAddressLookup(Mapping[str, Address]):
+    """Read-only address lookup backed by a memory-mapped snapshot written by `AddressLookup.save_snapshot`.
+
+    Only the fixed-width offset columns and the string pool are mapped; `Address` objects are materialized on
+    access, and zipcodes are found by binary search. Processes mapping the same file share a single copy of the data
+    in the page cache. Replacing the file with `save_snapshot` does not affect lookups that are already open. Only the
+    header is checked when the file is opened, so a corrupted string pool or record raises `SnapshotFormatError` when
+    it is accessed.
+
+    >>> import os, tempfile
+    >>> a = Address("1000001", "東京都", "千代田区", "千代田", "トウキョウト", "チヨダク", "チヨダ", "東京都", "千代田区", "千代田", "Tokyo-to", "Chiyoda-ku", "Chiyoda")
+    >>> with tempfile.TemporaryDirectory() as d:
+    ...     AddressLookup([a]).save_snapshot(os.path.join(d, "snapshot"))
+    ...     with MappedAddressLookup(os.path.join(d, "snapshot")) as lookup:
+    ...         str(lookup["100-0001"])
+    '東京都 千代田区 千代田'
+    """  # noqa: E501
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        with open(path, "rb") as fin:
+            try:
+                self._buf = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotFormatError(f"Truncated snapshot: {path}")
+        try:
+            self._layout = _parse_snapshot_layout(self._buf, path)
+        except SnapshotFormatError:
+            self._buf.close()
+            raise
+        self._zipcodes = _ZipcodeColumn(self)
+
+    @classmethod
+    def from_cached_japanpost_zipfile(
+        cls, cache_dir: Optional[str] = None, max_age: Optional[float] = japanpost_snapshot_max_age
+    ) -> "MappedAddressLookup":
+        """Map the Japan Post snapshot in the cache directory, building it first if it is missing or stale.
+
+        Args:
+            cache_dir (Optional[str]): Cache directory. `jittok.blob.default_cache_dir()` is used if omitted.
+            max_age (Optional[float]): Maximum age of the snapshot in seconds. It never expires if `None`.
+
+        Returns:
+            MappedAddressLookup: Address lookup.
+        """
+        path = os.path.join(cache_dir if cache_dir is not None else default_cache_dir(), _japanpost_snapshot_filename)
+        try:
+            retval = cls(path)
+            if _is_fresh(retval.built_at, max_age):
+                return retval
+            retval.close()
+        except (OSError, SnapshotFormatError):
+            ...
+        AddressLookup.from_japanpost_zipfile(cache_dir=cache_dir).save_snapshot(path)
+        return cls(path)
+
+    @property
+    def built_at(self) -> int:
+        """Time the snapshot was saved, in seconds since the epoch."""
+        return int(self._layout.built_at)
+
+    def close(self) -> None:
+        self._buf.close()
+
+    def __enter__(self) -> "MappedAddressLookup":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _string(self, i: int) -> str:
+        """Return a string of the pool, raising `SnapshotFormatError` if the snapshot turns out to be corrupted."""
+        if i >= self._layout.string_count:
+            raise SnapshotFormatError(f"Broken records: {self._path}")
+        start, end = _snapshot_uint32_pair.unpack_from(self._buf, self._layout.offsets_offset + i * 4)
+        if not start < end <= self._layout.records_offset - self._layout.pool_offset:
+            raise SnapshotFormatError(f"Broken string pool: {self._path}")
+        start += self._layout.pool_offset
+        end += self._layout.pool_offset - 1
+        try:
+            return self._buf[start:end].decode("utf-8")
+        except UnicodeDecodeError:
+            raise SnapshotFormatError(f"Broken string pool: {self._path}") from None
+
+    def _zipcode(self, i: int) -> str:
+        (idx,) = _snapshot_uint32.unpack_from(self._buf, self._layout.records_offset + i * _snapshot_record.size)
+        return self._string(idx)
+
+    def _record(self, i: int) -> Address:
+        row = _snapshot_record.unpack_from(self._buf, self._layout.records_offset + i * _snapshot_record.size)
+        return Address(*map(self._string, row))
+
+    def _find(self, zipcode: str) -> int:
+        i = bisect_left(self._zipcodes, zipcode)
+        if i < len(self) and self._zipcode(i) == zipcode:
+            return i
+        raise ZipcodeNotFoundError(f"Invalid zipcode: {zipcode}")
+
+    def __getitem__(self, key: str) -> Address:
+        return self._record(self._find(key.replace("-", "")))
+
+    def __len__(self) -> int:
+        return int(self._layout.record_count)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._zipcode(i) for i in range(len(self)))
+
+    def prefix_search(self, zip_prefix: str) -> List[Address]:
+        """Return the addresses whose zipcodes start with the prefix, in zipcode order.
+
+        Args:
+            zip_prefix (str): Leading digits of zipcodes. Hyphens are ignored.
+
+        Returns:
+            List[Address]: Matched addresses.
+        """
+        return list(self.iter_prefix_search(zip_prefix))
+
+    def iter_prefix_search(self, zip_prefix: str) -> Generator[Address, None, None]:
+        """Yield the addresses whose zipcodes start with the prefix, in zipcode order.
+
+        Args:
+            zip_prefix (str): Leading digits of zipcodes. Hyphens are ignored.
+
+        Returns:
+            Generator[Address, None, None]: Matched addresses.
+        """
+        start, stop = _prefix_range(self._zipcodes, zip_prefix.replace("-", ""))
+        for i in range(start, stop):
+            yield self._record(i)
+
+    def search(self, search_word: str) -> Generator[Address, None, None]:
+        for i in range(len(self)):
+            v = self._record(i)
+            if search_word in v.prefecture or search_word in v.city or search_word in v.town:
+                yield v
@@ -7,3 +7,7 @@ class BaseJpaddressError(BaseError):
 
 class ZipcodeNotFoundError(BaseJpaddressError, KeyError):
     ...
+
+
+class SnapshotFormatError(BaseJpaddressError, ValueError):
+    ...
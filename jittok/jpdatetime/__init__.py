@@ -1,3 +1,23 @@
-from .core import strptime
+from .core import (
+    DateFormatter,
+    DateParser,
+    Era,
+    compile_format,
+    eras,
+    find_dates,
+    find_dates_stream,
+    strftime,
+    strptime,
+)
 
-__all__ = ["strptime"]
+__all__ = [
+    "strptime",
+    "strftime",
+    "compile_format",
+    "DateParser",
+    "DateFormatter",
+    "Era",
+    "eras",
+    "find_dates",
+    "find_dates_stream",
+]
@@ -1,13 +1,47 @@
 import re
-from datetime import datetime
+import sys
+from bisect import bisect_right
+from calendar import monthrange
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Match, NamedTuple, Optional, Pattern, Tuple
 
+from .._numerals import small_numeral_units, split_sen_digits, trans_map
+from ..core import Callable
 
-def strptime(date_string: str, format: str) -> datetime:
+if sys.version_info >= (3, 9):
+    from collections.abc import Generator, Iterable
+else:
+    from typing import Generator, Iterable
+
+
+class Era(NamedTuple):
+    """A Japanese era, the first day of it and the letter abbreviating it."""
+
+    name: str
+    start: date
+    abbreviation: str
+
+
+# 明治 starts on the first day of the lunar year 1868, from which it was applied retroactively.
+eras = (
+    Era("明治", date(1868, 1, 25), "M"),
+    Era("大正", date(1912, 7, 30), "T"),
+    Era("昭和", date(1926, 12, 25), "S"),
+    Era("平成", date(1989, 1, 8), "H"),
+    Era("令和", date(2019, 5, 1), "R"),
+)
+_era_start_ordinals = [era.start.toordinal() for era in eras]
+_era_index = {era.name: i for i, era in enumerate(eras)}
+
+
+def strptime(date_string: str, format: str, strict: bool = False) -> datetime:
     """Convert a string to a datetime object according to a format string.
 
     Args:
         date_string (str): The string to convert.
         format (str): The format string.
+        strict (bool): If `True`, reject a date which is not in the era, such as `"平成31年5月"`.
 
     Returns:
         datetime: The datetime object.
@@ -30,22 +64,518 @@ def strptime(date_string: str, format: str) -> datetime:
         datetime.datetime(2019, 1, 1, 0, 0)
         >>> strptime("令和2年1月1日", "%Y年%m月%d日")
         datetime.datetime(2020, 1, 1, 0, 0)
+        >>> strptime("平成31年5月", "%Y年%m月", strict=True)
+        Traceback (most recent call last):
+        ...
+        ValueError: time data '平成31年5月' does not match format '%Y年%m月'
     """
-    return datetime.strptime(convert_wareki_year_to_seireki_year(date_string), format)
+    return compile_format(format, strict)(date_string)
 
 
-_era_regex_year = (
-    (re.compile("令和(?P<y>[元0-9]+)"), 2018),
-    (re.compile("平成(?P<y>[元0-9]+)"), 1988),
-    (re.compile("昭和(?P<y>[元0-9]+)"), 1925),
-    (re.compile("大正(?P<y>[元0-9]+)"), 1911),
-    (re.compile("明治(?P<y>[元0-9]+)"), 1867),
-)
+_era_year = {era.name: era.start.year - 1 for era in eras}
+_era_alternation = "|".join(_era_year)
+# Full-width and kanji digits translated by `trans_map`, and the units, which are all read by `_numeral_to_int`.
+_numeral_chars = f"{''.join(chr(c) for c in trans_map)}{''.join(small_numeral_units)}"
+# Kanji numerals below 10000 with at most one digit before each unit and after the last one, once translated.
+_numeral_with_units_regex = re.compile("[1-9]?千?[1-9]?百?[1-9]?十?[1-9]?")
+_numeral = f"[{_numeral_chars}]"
+_era_year_pattern = f"元|[0-9]+|{_numeral}+"
+_era_regex = re.compile(f"(?P<era>{_era_alternation})(?P<y>{_era_year_pattern})")
 
 
 def convert_wareki_year_to_seireki_year(date_string: str) -> str:
-    for era_regex, year in _era_regex_year:
-        m = re.search(era_regex, date_string)
-        if m is not None:
-            return f'{date_string[:m.start()]}{int(m.group("y").replace("元", "1")) + year}{date_string[m.end():]}'
-    return date_string
+    return _convert_wareki_year(date_string)[0]
+
+
+def _convert_wareki_year(date_string: str) -> Tuple[str, Optional[str]]:
+    """Replace the era and the year in it with the year, and return the result with the name of the era."""
+    m = _era_regex.search(date_string)
+    if m is not None:
+        era_year = m["y"]
+        try:
+            year = (1 if era_year == "元" else _numeral_to_int(era_year)) + _era_year[m["era"]]
+        except ValueError:
+            return date_string, None
+        return f"{date_string[:m.start()]}{year}{date_string[m.end():]}", m["era"]
+    return date_string, None
+
+
+def _is_in_era(name: str, first: int, last: int) -> bool:
+    """Return whether any day from ordinal `first` to ordinal `last` is in the era `name`."""
+    i = _era_index[name]
+    return _era_start_ordinals[i] <= last and (i + 1 == len(eras) or first < _era_start_ordinals[i + 1])
+
+
+def _last_ordinal(d: date, precision: str) -> int:
+    """Return the ordinal of the last day of the year, month or day of `d`, as `precision` is `"Y"`, `"m"` or `"d"`."""
+    if precision == "d":
+        return d.toordinal()
+    if precision == "m":
+        return date(d.year, d.month, monthrange(d.year, d.month)[1]).toordinal()
+    return date(d.year, 12, 31).toordinal()
+
+
+def _format_precision(format: str) -> str:
+    """Return `"d"` if `format` gives the day, `"m"` if it gives only the month, and `"Y"` otherwise."""
+    directives = {m[1] for m in _format_token_regex.finditer(format) if m[0].startswith("%")}
+    if directives & {"d", "j"}:
+        return "d"
+    if directives & {"m", "b", "B"}:
+        return "m"
+    return "Y"
+
+
+# Directives which `DateParser` parses by itself, with the same patterns as `datetime.strptime`. `%Y` also accepts
+# a Japanese era followed by the year in the era, and all but `%y` and `%f` also accept full-width and kanji numerals.
+_directive_patterns = {
+    "Y": rf"(?:(?P<era>{_era_alternation})(?P<era_year>{_era_year_pattern})|(?P<Y>\d\d\d\d|{_numeral}{{2,6}}))",
+    "y": r"(?P<y>\d\d)",
+    "m": rf"(?P<m>1[0-2]|0[1-9]|[1-9]|{_numeral}{{1,3}})",
+    "d": rf"(?P<d>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9]|{_numeral}{{1,3}})",
+    "H": rf"(?P<H>2[0-3]|[0-1]\d|\d|{_numeral}{{1,3}})",
+    "M": rf"(?P<M>[0-5]\d|\d|{_numeral}{{1,3}})",
+    "S": rf"(?P<S>6[0-1]|[0-5]\d|\d|{_numeral}{{1,3}})",
+    "f": r"(?P<f>[0-9]{1,6})",
+}
+_format_token_regex = re.compile(r"%(.?)|\s+|[^%\s]+", re.DOTALL)
+
+
+def _compile_format_regex(format: str) -> Optional[Pattern[str]]:
+    """Translate a format string into a regular expression, or return `None` if it has other directives."""
+    buf = []
+    seen = set()
+    for m in _format_token_regex.finditer(format):
+        token = m[0]
+        if token.startswith("%"):
+            directive = m[1]
+            if directive == "%":
+                buf.append("%")
+                continue
+            if directive not in _directive_patterns or directive in seen:
+                return None
+            seen.add(directive)
+            buf.append(_directive_patterns[directive])
+        elif token.isspace():
+            buf.append(r"\s+")
+        else:
+            buf.append(re.escape(token))
+    return re.compile("".join(buf), re.IGNORECASE)
+
+
+class DateParser(Callable[str, datetime]):
+    """Precompiled `strptime` for a fixed format string.
+
+    The format string is translated into one regular expression when `%Y`, `%y`, `%m`, `%d`, `%H`, `%M`, `%S` and
+    `%f` are its only directives, and matched strings are converted directly. Japanese eras are matched by one
+    alternation in place of `%Y`, and numbers but `%y` and `%f` may be written in full-width digits or kanji numerals,
+    such as `"令和五年十二月三日"`. Other format strings are handed over to `datetime.strptime` after converting the
+    era year. Create instances with `compile_format`, which caches them.
+
+    With `strict`, a date with an era is rejected unless the era had begun and not yet ended in the year, month or day
+    it gives, depending on whether the format has the month and the day.
+
+    >>> parser = compile_format("%Y年%m月%d日")
+    >>> parser("令和元年5月1日")
+    datetime.datetime(2019, 5, 1, 0, 0)
+    >>> parser.parse_many(["平成31年4月30日", "平成31年4月31日"], errors="coerce")
+    [datetime.datetime(2019, 4, 30, 0, 0), None]
+    """
+
+    def __init__(self, format: str, strict: bool = False) -> None:
+        self.format = format
+        self.strict = strict
+        self._regex = _compile_format_regex(format)
+        self._precision = _format_precision(format)
+
+    def __call__(self, date_string: str) -> datetime:
+        if self._regex is None:
+            converted, era = _convert_wareki_year(date_string)
+            parsed = datetime.strptime(converted, self.format)
+            if era is None or self._is_in_era(era, parsed):
+                return parsed
+            raise ValueError(f"time data {date_string!r} does not match format {self.format!r}")
+        retval = self._parse(date_string)
+        if retval is None:
+            raise ValueError(f"time data {date_string!r} does not match format {self.format!r}")
+        return retval
+
+    def parse_many(self, values: Iterable[Any], errors: str = "raise") -> List[Any]:
+        """Parse each of `values`, such as a column of a spreadsheet.
+
+        Each distinct value is parsed only once.
+
+        Args:
+            values (Iterable[Any]): Strings to parse.
+            errors (str): `"raise"` to raise an error on an invalid value, `"coerce"` to replace it with `None`, or
+                `"ignore"` to leave it as is.
+
+        Returns:
+            List[Any]: Parsed values in the same order as `values`.
+
+        Raises:
+            ValueError: Invalid `errors`, or an invalid value while `errors` is `"raise"`.
+            TypeError: A value which is not a string while `errors` is `"raise"`.
+        """
+        if errors not in ("raise", "coerce", "ignore"):
+            raise ValueError(f"errors must be 'raise', 'coerce' or 'ignore', not '{errors}'")
+        memo: Dict[str, Optional[datetime]] = {}
+        retval: List[Any] = []
+        for x in values:
+            if not isinstance(x, str):
+                if errors == "raise":
+                    raise TypeError(f"strptime() argument 1 must be str, not {type(x).__name__}")
+                retval.append(None if errors == "coerce" else x)
+                continue
+            if x in memo:
+                value = memo[x]
+            else:
+                value = memo[x] = self._parse(x)
+            if value is None:
+                if errors == "raise":
+                    raise ValueError(f"time data {x!r} does not match format {self.format!r}")
+                retval.append(None if errors == "coerce" else x)
+            else:
+                retval.append(value)
+        return retval
+
+    def _parse(self, x: str) -> Optional[datetime]:
+        if self._regex is None:
+            try:
+                return self(x)
+            except ValueError:
+                return None
+        m = self._regex.fullmatch(x)
+        if m is None:
+            return None
+        groups = m.groupdict()
+        era = groups.get("era")
+        fraction = groups.get("f")
+        try:
+            if era is not None:
+                era_year = groups["era_year"]
+                year = _era_year[era] + (1 if era_year == "元" else _numeral_to_int(era_year))
+            elif groups.get("y") is not None:
+                year = _group_int(groups, "y", 0)
+                year += 2000 if year <= 68 else 1900
+            else:
+                year = _group_int(groups, "Y", 1900, positional=True)
+            retval = datetime(
+                year,
+                _group_int(groups, "m", 1),
+                _group_int(groups, "d", 1),
+                _group_int(groups, "H", 0),
+                _group_int(groups, "M", 0),
+                _group_int(groups, "S", 0),
+                0 if fraction is None else int(fraction.ljust(6, "0")),
+            )
+        except ValueError:
+            return None
+        if era is None or self._is_in_era(era, retval):
+            return retval
+        return None
+
+    def _is_in_era(self, era: str, d: date) -> bool:
+        return not self.strict or _is_in_era(era, d.toordinal(), _last_ordinal(d, self._precision))
+
+
+def _group_int(groups: Dict[str, Optional[str]], name: str, default: int, positional: bool = False) -> int:
+    value = groups.get(name)
+    return default if value is None else _numeral_to_int(value, positional)
+
+
+def _numeral_to_int(x: str, positional: bool = False) -> int:
+    """Read digits, such as `"12"` or `"１２"`, or kanji numerals with units, such as `"三十一"`.
+
+    Units must be strictly decreasing with at most one digit before each of them and after the last one. Kanji digits
+    without units, such as `"二〇二三"`, are only read with `positional`, for years. Surrounding spaces, as in the
+    space-padded `" 5"` matched by `%d`, are ignored.
+
+    Raises:
+        ValueError: `x` is not such a numeral, e.g. `"十十"` or `"二二"`.
+    """
+    x = x.strip()
+    if x.isdecimal():
+        return int(x)
+    translated = x.translate(trans_map)
+    if translated.isdecimal() and (positional or len(translated) == 1):
+        return int(translated)
+    terms = split_sen_digits(translated) if _numeral_with_units_regex.fullmatch(translated) is not None else None
+    if terms is None or any(len(integer) != 1 for integer, _ in terms.values()):
+        raise ValueError(f"invalid numeral: {x!r}")
+    return sum(int(integer) * 10**place for place, (integer, _) in terms.items())
+
+
+@lru_cache(maxsize=128)
+def compile_format(format: str, strict: bool = False) -> DateParser:
+    """Return a `DateParser` for `format`, reusing the one created for the same format before."""
+    return DateParser(format, strict)
+
+
+_kanji_digits = "〇一二三四五六七八九"
+_strftime_token_regex = re.compile(r"%(?:(OE|E|O)(.?)|.?)|[^%]+", re.DOTALL)
+_era_directives = frozenset(("EC", "Ey", "EY", "OEy", "OEY"))
+_kanji_directives = frozenset(("Od", "Om", "OH", "OM", "OS", "OY"))
+
+
+def _era_of(d: date) -> Era:
+    i = bisect_right(_era_start_ordinals, d.toordinal()) - 1
+    if i < 0:
+        raise ValueError(f"{d.isoformat()} is before {eras[0].name}")
+    return eras[i]
+
+
+@lru_cache(maxsize=128)
+def _kanji_numeral(n: int) -> str:
+    """Write a number less than 10000 in kanji numerals with 千, 百 and 十, such as `"二十三"`."""
+    if n == 0:
+        return _kanji_digits[0]
+    buf = []
+    for unit, exponent in (("千", 3), ("百", 2), ("十", 1)):
+        digit = n // 10**exponent % 10
+        if digit > 0:
+            buf.append(unit if digit == 1 else _kanji_digits[digit] + unit)
+    if n % 10 > 0:
+        buf.append(_kanji_digits[n % 10])
+    return "".join(buf)
+
+
+def _format_era_directive(directive: str, d: date, era: Era) -> str:
+    if directive == "EC":
+        return era.name
+    year = d.year - era.start.year + 1
+    year_string = _kanji_numeral(year) if directive.startswith("O") else str(year)
+    if directive.endswith("y"):
+        return year_string
+    return f"{era.name}{'元' if year == 1 else year_string}年"
+
+
+def _format_kanji_directive(directive: str, d: date) -> str:
+    if directive == "OY":
+        return "".join(_kanji_digits[int(c)] for c in str(d.year))
+    if directive == "Od":
+        return _kanji_numeral(d.day)
+    if directive == "Om":
+        return _kanji_numeral(d.month)
+    return _kanji_numeral(getattr(d, {"OH": "hour", "OM": "minute", "OS": "second"}[directive], 0))
+
+
+class DateFormatter(Callable[date, str]):
+    """Precompiled `strftime` for a fixed format string.
+
+    The format string is split once into the directives for Japanese eras and kanji numerals and the rest, which is
+    formatted by `date.strftime`. The era of each date is looked up by bisection over the first days of the eras.
+
+    >>> formatter = DateFormatter("%OEY%Om月%Od日")
+    >>> formatter(date(2019, 5, 1))
+    '令和元年五月一日'
+    >>> formatter(date(2019, 4, 30))
+    '平成三十一年四月三十日'
+    """
+
+    def __init__(self, format: str) -> None:
+        self.format = format
+        self._parts: List[Tuple[str, str]] = []
+        self._uses_era = False
+        buf: List[str] = []
+        has_directive = False
+        for m in _strftime_token_regex.finditer(format):
+            token = m[0]
+            if m[1] is None:
+                buf.append(token)
+                has_directive = has_directive or (token.startswith("%") and token != "%%")
+                continue
+            directive = token[1:]
+            if directive not in _era_directives and directive not in _kanji_directives:
+                raise ValueError(f"unsupported directive '%{directive}' in format '{format}'")
+            if buf:
+                self._append_strftime_part("".join(buf), has_directive)
+                buf, has_directive = [], False
+            if directive in _era_directives:
+                self._parts.append(("era", directive))
+                self._uses_era = True
+            else:
+                self._parts.append(("kanji", directive))
+        if buf:
+            self._append_strftime_part("".join(buf), has_directive)
+
+    def _append_strftime_part(self, chunk: str, has_directive: bool) -> None:
+        if has_directive:
+            self._parts.append(("strftime", chunk))
+        else:
+            self._parts.append(("literal", chunk.replace("%%", "%")))
+
+    def __call__(self, d: date) -> str:
+        era = _era_of(d) if self._uses_era else eras[0]
+        buf = []
+        for kind, value in self._parts:
+            if kind == "literal":
+                buf.append(value)
+            elif kind == "strftime":
+                buf.append(d.strftime(value))
+            elif kind == "era":
+                buf.append(_format_era_directive(value, d, era))
+            else:
+                buf.append(_format_kanji_directive(value, d))
+        return "".join(buf)
+
+
+@lru_cache(maxsize=128)
+def _get_date_formatter(format: str) -> DateFormatter:
+    return DateFormatter(format)
+
+
+def strftime(d: date, format: str) -> str:
+    """Convert a date or datetime object to a string according to a format string.
+
+    In addition to the directives of `date.strftime`, the following directives are supported:
+
+    - `%EC`: The era, such as `令和`.
+    - `%Ey`: The year in the era, such as `1`.
+    - `%EY`: The era and the year in it with `年`, where the first year is `元年`, such as `令和元年` or `令和2年`.
+    - `%OY`: The year in kanji digits, such as `二〇一九`.
+    - `%Om`, `%Od`, `%OH`, `%OM`, `%OS`: The month, day, hour, minute and second in kanji numerals, such as `十二`.
+    - `%OEy`, `%OEY`: `%Ey` and `%EY` in kanji numerals, such as `令和五年`.
+
+    Args:
+        d (date): The date or datetime object to convert.
+        format (str): The format string.
+
+    Returns:
+        str: The formatted string.
+
+    Raises:
+        ValueError: If `format` has an unsupported `%E` or `%O` directive, or the era is required for a date before
+            明治.
+
+    Examples:
+        >>> from datetime import datetime
+        >>> from jittok.jpdatetime import strftime
+        >>> strftime(datetime(2019, 4, 30), "%EY%m月%d日")
+        '平成31年04月30日'
+        >>> strftime(datetime(2019, 5, 1), "%EC%Ey年%m月%d日")
+        '令和1年05月01日'
+        >>> strftime(datetime(2023, 12, 3, 15, 30), "%OEY%Om月%Od日 %OH時%OM分")
+        '令和五年十二月三日 十五時三十分'
+        >>> strftime(datetime(2023, 12, 3), "%OY年")
+        '二〇二三年'
+    """
+    return _get_date_formatter(format)(d)
+
+
+# The letters of the eras, in ASCII and in full-width.
+_era_by_abbreviation = {
+    letter: era.name for era in eras for letter in (era.abbreviation, chr(ord(era.abbreviation) + 0xFEE0))
+}
+_date_space = "[ 　]{0,3}"
+_date_separator_digits = "[0-9]{1,2}|[０-９]{1,2}"
+_date_kanji_field = rf"[0-9]{{1,2}}|{_numeral}{{1,3}}"
+_date_regex = re.compile(
+    "(?:"
+    rf"(?P<era>{_era_alternation}){_date_space}(?P<era_year>元|[0-9]{{1,3}}|{_numeral}{{1,4}})"
+    rf"|(?<![A-Za-zＡ-Ｚａ-ｚ])(?P<abbreviation>[{''.join(_era_by_abbreviation)}])"
+    rf"(?P<abbreviation_year>{_date_separator_digits})(?=[./\-．／－])"
+    rf"|(?<![0-9{_numeral_chars}])(?P<year>[0-9]{{4}}|[０-９]{{4}}|{_numeral}{{2,6}})"
+    ")(?:"
+    rf"{_date_space}年{_date_space}(?P<month>{_date_kanji_field}){_date_space}月"
+    rf"{_date_space}(?P<day>{_date_kanji_field}){_date_space}日"
+    rf"|(?P<separator>[./\-．／－])(?P<separator_month>{_date_separator_digits})"
+    rf"(?P=separator)(?P<separator_day>{_date_separator_digits})(?![0-9０-９])"
+    ")"
+)
+# Longer than any match of `_date_regex` together with the character after it.
+_date_match_max_length = 64
+
+
+def find_dates(text: str, strict: bool = False) -> Generator[Tuple[Tuple[int, int], datetime], None, None]:
+    """Find dates in free text.
+
+    Dates are written with an era, such as `"令和4年3月31日"` or `"平成三十一年四月一日"`, with a year, such as
+    `"2022年3月31日"`, `"2022/3/31"` or `"2022-03-31"`, or with the letter of an era, such as `"R4.3.31"`. Numbers may
+    be written in full-width digits, and also in kanji numerals in the forms with `年`, `月` and `日`. All forms are
+    matched by one regular expression in a single scan from left to right.
+
+    Args:
+        text (str): Text to search.
+        strict (bool): If `True`, skip a date which is not in its era, such as `"平成31年5月1日"`.
+
+    Returns:
+        Generator[Tuple[Tuple[int, int], datetime], None, None]: `(span, datetime)` of each date.
+
+    >>> list(find_dates("令和4年3月31日付の通知（R4.3.31）を2022/4/1に受領"))  # doctest: +NORMALIZE_WHITESPACE
+    [((0, 9), datetime.datetime(2022, 3, 31, 0, 0)), ((14, 21), datetime.datetime(2022, 3, 31, 0, 0)),
+     ((23, 31), datetime.datetime(2022, 4, 1, 0, 0))]
+    """
+    for m in _date_regex.finditer(text):
+        value = _date_from_match(m, strict)
+        if value is not None:
+            yield m.span(), value
+
+
+def find_dates_stream(
+    chunks: Iterable[str], strict: bool = False
+) -> Generator[Tuple[Tuple[int, int], datetime], None, None]:
+    """Find dates in text given in chunks, such as the lines of a file.
+
+    Dates over the boundaries of the chunks are found as well, and the spans are offsets in the whole text. Only the
+    text which may still be a part of a date is kept between the chunks.
+
+    Args:
+        chunks (Iterable[str]): Text to search.
+        strict (bool): See `find_dates`.
+
+    Returns:
+        Generator[Tuple[Tuple[int, int], datetime], None, None]: `(span, datetime)` of each date.
+
+    >>> list(find_dates_stream(["受付：令和4年", "3月31日"]))
+    [((3, 12), datetime.datetime(2022, 3, 31, 0, 0))]
+    """
+    buf = ""
+    offset = 0
+    pos = 0
+    for chunk in chunks:
+        buf += chunk
+        cutoff = len(buf) - _date_match_max_length
+        if cutoff <= pos:
+            continue
+        for m in _date_regex.finditer(buf, pos):
+            if m.start() >= cutoff:
+                break
+            value = _date_from_match(m, strict)
+            if value is not None:
+                yield (offset + m.start(), offset + m.end()), value
+            pos = m.end()
+        # Keep the character before the position to resume from, which the lookbehinds of `_date_regex` may look at.
+        kept = max(pos, cutoff) - 1
+        offset += kept
+        buf = buf[kept:]
+        pos = 1
+    for m in _date_regex.finditer(buf, pos):
+        value = _date_from_match(m, strict)
+        if value is not None:
+            yield (offset + m.start(), offset + m.end()), value
+
+
+def _date_from_match(m: Match[str], strict: bool) -> Optional[datetime]:
+    groups = m.groupdict()
+    era = groups["era"]
+    if groups["separator"] is None:
+        month, day = groups["month"], groups["day"]
+    else:
+        month, day = groups["separator_month"], groups["separator_day"]
+    try:
+        if era is not None:
+            era_year = groups["era_year"]
+            year = _era_year[era] + (1 if era_year == "元" else _numeral_to_int(era_year))
+        elif groups["abbreviation"] is not None:
+            era = _era_by_abbreviation[groups["abbreviation"]]
+            year = _era_year[era] + _numeral_to_int(groups["abbreviation_year"])
+        else:
+            year = _numeral_to_int(groups["year"], positional=True)
+            if year < 1000:
+                return None
+        retval = datetime(year, _numeral_to_int(month), _numeral_to_int(day))
+    except ValueError:
+        return None
+    if strict and era is not None and not _is_in_era(era, retval.toordinal(), retval.toordinal()):
+        return None
+    return retval
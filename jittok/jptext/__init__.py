@@ -1,19 +1,53 @@
 from .core import (
+    EncodingGuess,
+    Normalizer,
+    cached_kanji_to_hiragana,
+    cached_kanji_to_kana,
+    cached_kanji_to_romaji,
+    clear_transliteration_cache,
     decode,
+    decode_stream,
+    detect_encoding,
+    find_numerics,
+    get_normalizer,
     guess_encoding,
     kanji_to_hiragana,
     kanji_to_kana,
     kanji_to_romaji,
     normalize,
+    normalize_stream,
+    set_transliteration_cache_size,
+    split_lines,
     to_numeric,
+    to_numeric_many,
+    transliterate,
+    transliterate_many,
+    transliteration_cache_info,
 )
 
 __all__ = [
     "normalize",
+    "Normalizer",
+    "normalize_stream",
+    "get_normalizer",
     "decode",
+    "decode_stream",
+    "split_lines",
     "to_numeric",
+    "to_numeric_many",
+    "find_numerics",
     "guess_encoding",
+    "detect_encoding",
+    "EncodingGuess",
     "kanji_to_kana",
     "kanji_to_hiragana",
     "kanji_to_romaji",
+    "cached_kanji_to_kana",
+    "cached_kanji_to_hiragana",
+    "cached_kanji_to_romaji",
+    "transliterate",
+    "transliterate_many",
+    "transliteration_cache_info",
+    "clear_transliteration_cache",
+    "set_transliteration_cache_size",
 ]
@@ -1,16 +1,41 @@
 import sys
 from argparse import ArgumentParser, Namespace
 
-from . import normalize
+from . import decode_stream, normalize_stream
 
 
 def setup_argument_subparser(parser: ArgumentParser) -> None:
     subsubparsers = parser.add_subparsers(dest="subsubcommand")
-    subsubparsers.add_parser("normalize")
+    normalize_parser = subsubparsers.add_parser("normalize")
+    normalize_parser.add_argument("--newline-to-space", action="store_true", help="replace newlines with spaces")
+    normalize_parser.add_argument(
+        "--remove-multiple-spaces", action="store_true", help="replace consecutive spaces with a single space"
+    )
+    normalize_parser.add_argument(
+        "--remove-variation-selectors", action="store_true", help="remove ideographic variation selectors"
+    )
+    normalize_parser.add_argument(
+        "--chunk-size", type=int, default=1 << 16, help="number of bytes read from stdin at a time"
+    )
+    normalize_parser.add_argument(
+        "--encoding", default="utf-8", help="encoding of stdin; 'auto' to guess it from its beginning"
+    )
+    normalize_parser.add_argument(
+        "--jobs", type=int, default=1, help="number of worker processes; output order is preserved"
+    )
 
 
 def main(args: Namespace) -> None:
     if args.subsubcommand == "normalize":
-        sys.stdout.write(normalize(sys.stdin.read()))
+        for normalized in normalize_stream(
+            decode_stream(
+                sys.stdin.buffer, args.chunk_size, encoding=None if args.encoding == "auto" else args.encoding
+            ),
+            newline_to_space=args.newline_to_space,
+            remove_multiple_spaces=args.remove_multiple_spaces,
+            remove_variation_selectors=args.remove_variation_selectors,
+            workers=args.jobs,
+        ):
+            sys.stdout.write(normalized)
     else:
         args.print_help()
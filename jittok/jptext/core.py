@@ -1,14 +1,45 @@
+import codecs
 import math
 import re
 import sys
+import threading
 import unicodedata
-from typing import Optional, Union
+from decimal import Decimal
+from functools import _CacheInfo, lru_cache, partial
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    overload,
+)
 
-import pykakasi
 import regex
 
+from .._numerals import (
+    small_numeral_units,
+    split_basic_number,
+    split_sen_digits,
+    trans_map,
+)
+from ..core import Callable, map_in_processes
 from .exceptions import UnknownEncodingError
 
+if sys.version_info >= (3, 9):
+    from collections.abc import Generator, Iterable
+else:
+    from typing import Generator, Iterable
+
+if TYPE_CHECKING:
+    from typing import Literal
+
+    import pykakasi
+
 if sys.version_info < (3, 9):
     from typing import Pattern
 
@@ -16,8 +47,6 @@ if sys.version_info < (3, 9):
 else:
     PatternT = Union[re.Pattern[str], regex.regex.Pattern[str]]
 
-kks = pykakasi.kakasi()
-
 codec_list = [
     "utf_8",
     "utf_8_sig",
@@ -32,121 +61,222 @@ codec_list = [
 ]
 
 
+_byte_order_marks = [
+    (codecs.BOM_UTF32_LE, "utf_32"),
+    (codecs.BOM_UTF32_BE, "utf_32"),
+    (codecs.BOM_UTF8, "utf_8_sig"),
+    (codecs.BOM_UTF16_LE, "utf_16"),
+    (codecs.BOM_UTF16_BE, "utf_16"),
+]
+encoding_sample_size = 1 << 16
+_encoding_score_weights = [
+    (regex.compile(r"[\u3000-\u30ff\uff01-\uff9f]"), 1.0),
+    (regex.compile(r"[\u4e00-\u9fff]"), 0.7),
+    (regex.compile(r"[\t\n\r\x20-\x7e\u00a0-\u024f]"), 0.6),
+    (regex.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\u1100-\u11ff\uac00-\ud7ff\ue000-\uf8ff\ufeff\ufffd]"), -1.0),
+]
+
+
+class EncodingGuess(NamedTuple):
+    """Result of `detect_encoding`."""
+
+    encoding: str
+    confidence: float
+
+
+def detect_encoding(
+    x: bytes, hint: Optional[Union[str, PatternT]] = None, sample_size: int = encoding_sample_size
+) -> EncodingGuess:
+    """Guess the encoding of Japanese text.
+
+    A byte order mark decides the encoding by itself. Otherwise only the first `sample_size` bytes are decoded, with an
+    incremental decoder of each codec in `codec_list`. UTF-8 is taken whenever the sample has multi-byte characters
+    and decodes into text without control characters, hangul or private use characters, as other encodings rarely
+    happen to be valid UTF-8. Failing that, the candidates are scored by the characters they yield: kana and
+    full-width symbols score highest, then kanji and Latin letters, while control characters, hangul and private use
+    characters count against the candidate. Ties go to the codec which comes first in `codec_list`.
+
+    Args:
+        x (bytes): Encoded text.
+        hint (Optional[Union[str, PatternT]]): Pattern which the beginning of the decoded text must match.
+        sample_size (int): Number of bytes to examine.
+
+    Returns:
+        EncodingGuess: The encoding and a confidence between 0.0 and 1.0: 1.0 for a byte order mark, otherwise the
+            share of characters in the decoded sample which look like text. Unless UTF-8 is taken, it is scaled by the
+            share of the chosen score in the sum with the best score of a candidate which decodes differently, so that
+            it is halved when two decodings are equally likely.
+
+    Raises:
+        UnknownEncodingError: No codec decodes `x` into something like Japanese text.
+
+    >>> detect_encoding("期待した値".encode("utf_8"))
+    EncodingGuess(encoding='utf_8', confidence=1.0)
+    """
+    encoding, confidence, _, _ = _detect_encoding(x, hint, sample_size)
+    return EncodingGuess(encoding, confidence)
+
+
 def guess_encoding(x: bytes, hint: Optional[Union[str, PatternT]] = None) -> str:
-    if hint is None:
-        return guess_encoding(
-            x,
-            regex.compile(
-                r"[\p{Script=Han}\u3041-\u309F\u30A1-\u30FF\uFF01-\uFF0F\uFF1A-\uFF20"
-                r"\uFF3B-\uFF40\uFF5B-\uFF65\u3000-\u303F]+"
-            ),
-        )
-    if isinstance(hint, str):
-        return guess_encoding(x, re.compile(hint))
-    for c in codec_list:
-        try:
-            buf = x.decode(c)
-            if hint.match(buf) is not None:
-                return c
-        except ValueError:
-            ...
-    raise UnknownEncodingError()
+    return detect_encoding(x, hint).encoding
 
 
 def decode(x: bytes) -> str:
-    return x.decode(guess_encoding(x))
+    """Decode text in the encoding guessed by `detect_encoding`.
 
+    The decoder which has decoded the sample during the detection decodes the rest, so no byte is decoded twice.
+    """
+    _, _, decoder, sample = _detect_encoding(x, None, encoding_sample_size)
+    if len(x) <= encoding_sample_size:
+        return sample
+    return sample + decoder.decode(x[encoding_sample_size:], final=True)
 
-_basic_number_string = r"(?:(?:(?:[0-9]{0,3})(?:,[0-9]{3})+)|(?:[0-9]*))(?:\.[0-9]+)?"
-_four_digits_string_regex_str = (
-    rf"^((?P<千>{_basic_number_string})千)?"
-    rf"((?P<百>{_basic_number_string})百)?"
-    rf"((?P<十>{_basic_number_string})十)?"
-    rf"((?P<一>{_basic_number_string}))?$"
-)
 
-numeric_string_regex = re.compile(
-    r"^(?P<minus>-)?"
-    + "".join(
-        (
-            rf"(?:(?P<{dig}>({_basic_number_string}千)?"
-            rf"({_basic_number_string}百)?"
-            rf"({_basic_number_string}十)?"
-            rf"({_basic_number_string})?)?{dig})?"
-            for dig in [
-                "無量大数",
-                "不可思議",
-                "那由他",
-                "阿僧祇",
-                "恒河沙",
-                "極",
-                "載",
-                "正",
-                "澗",
-                "溝",
-                "穣",
-                "𥝱",
-                "垓",
-                "京",
-                "兆",
-                "億",
-                "万",
-            ]
-        )
-    )
-    + (
-        rf"(?P<一>({_basic_number_string}千)?"
-        rf"({_basic_number_string}百)?"
-        rf"({_basic_number_string}十)?"
-        rf"({_basic_number_string})?)?$"
-    )
-)
+def decode_stream(
+    fileobj: IO[bytes],
+    chunk_size: int = encoding_sample_size,
+    encoding: Optional[str] = None,
+    hint: Optional[Union[str, PatternT]] = None,
+) -> Generator[str, None, None]:
+    """Decode a binary file object incrementally.
 
-_four_digits_string_regex = re.compile(_four_digits_string_regex_str)
-trans_map = str.maketrans(
-    {
-        "１": "1",
-        "２": "2",
-        "３": "3",
-        "４": "4",
-        "５": "5",
-        "６": "6",
-        "７": "7",
-        "８": "8",
-        "９": "9",
-        "０": "0",
-        "一": "1",
-        "二": "2",
-        "三": "3",
-        "四": "4",
-        "五": "5",
-        "六": "6",
-        "七": "7",
-        "八": "8",
-        "九": "9",
-        "〇": "0",
-        "壱": "1",
-        "弐": "2",
-        "参": "3",
-        "零": "0",
-    }
-)
+    Unless `encoding` is given, the encoding is guessed as in `detect_encoding` from the first `encoding_sample_size`
+    bytes, and the decoder which has decoded them decodes the rest chunk by chunk. Use `split_lines` to pass the
+    result to `csv.reader`.
 
+    Args:
+        fileobj (IO[bytes]): Binary file object to read.
+        chunk_size (int): Number of bytes read at a time after the sample.
+        encoding (Optional[str]): Encoding of the file, if known.
+        hint (Optional[Union[str, PatternT]]): See `detect_encoding`.
 
-def to_numeric(x: str) -> Union[float, int]:
-    if not isinstance(x, str):
-        raise TypeError(f"to_numeric() argument must be a string, not '{type(x)}'")
+    Returns:
+        Generator[str, None, None]: Decoded text chunks.
+
+    Raises:
+        UnknownEncodingError: The encoding is not given and cannot be guessed.
+
+    >>> import io
+    >>> "".join(decode_stream(io.BytesIO("期待した値".encode("euc_jp")), chunk_size=3))
+    '期待した値'
+    """
+    sample = b""
+    while len(sample) < encoding_sample_size:
+        chunk = fileobj.read(encoding_sample_size - len(sample))
+        if len(chunk) == 0:
+            break
+        sample += chunk
+    if len(sample) == 0:
+        return
+    final = len(sample) < encoding_sample_size
+    if encoding is None:
+        _, _, decoder, text = _detect_sample_encoding(sample, final, hint)
+    else:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        text = decoder.decode(sample, final=final)
+    if len(text) > 0:
+        yield text
+    if final:
+        return
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        text = decoder.decode(chunk)
+        if len(text) > 0:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if len(text) > 0:
+        yield text
+
+
+_line_regex = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)")
+
+
+def split_lines(chunks: Iterable[str]) -> Generator[str, None, None]:
+    """Regroup text chunks into lines, keeping the line endings as a file opened with `newline=""` does.
+
+    >>> list(split_lines(["a,b\\r", "\\nc", ",d\\ne", ""]))
+    ['a,b\\r\\n', 'c,d\\n', 'e']
+    """
+    buf = ""
+    for chunk in chunks:
+        if "\n" not in chunk and "\r" not in chunk and not buf.endswith("\r"):
+            buf += chunk
+            continue
+        buf += chunk
+        end = 0
+        for m in _line_regex.finditer(buf):
+            if m.end() == len(buf) and buf.endswith("\r"):
+                break
+            yield m[0]
+            end = m.end()
+        buf = buf[end:]
+    if len(buf) > 0:
+        yield buf
+
+
+def _detect_encoding(
+    x: bytes, hint: Optional[Union[str, PatternT]], sample_size: int
+) -> Tuple[str, float, codecs.IncrementalDecoder, str]:
+    return _detect_sample_encoding(x[:sample_size], len(x) <= sample_size, hint)
+
+
+def _detect_sample_encoding(
+    sample: bytes, final: bool, hint: Optional[Union[str, PatternT]]
+) -> Tuple[str, float, codecs.IncrementalDecoder, str]:
+    if isinstance(hint, str):
+        hint = re.compile(hint)
+    for bom, encoding in _byte_order_marks:
+        if sample.startswith(bom):
+            decoded = _decode_sample(encoding, sample, final)
+            if decoded is not None and (hint is None or hint.match(decoded[1]) is not None):
+                return (encoding, 1.0, *decoded)
+            break
+    candidates = []
+    for encoding in codec_list:
+        decoded = _decode_sample(encoding, sample, final)
+        if decoded is None or (hint is not None and hint.match(decoded[1]) is None):
+            continue
+        score, plausible, implausible = _score_text(decoded[1])
+        if encoding == "utf_8" and score > 0 and implausible == 0 and len(decoded[1]) < len(sample):
+            return (encoding, plausible, *decoded)
+        if score > 0:
+            candidates.append((score, plausible, encoding, decoded))
+    if len(candidates) == 0:
+        raise UnknownEncodingError()
+    best_score, plausible, encoding, (decoder, text) = max(candidates, key=lambda c: c[0])
+    runner_up_score = max((c[0] for c in candidates if c[3][1] != text), default=0.0)
+    return encoding, plausible * best_score / (best_score + runner_up_score), decoder, text
+
+
+def _decode_sample(encoding: str, sample: bytes, final: bool) -> Optional[Tuple[codecs.IncrementalDecoder, str]]:
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        return decoder, decoder.decode(sample, final=final)
+    except ValueError:
+        return None
+
+
+def _score_text(x: str) -> Tuple[float, float, int]:
+    """Return the mean weight of the characters in `x`, the share of characters with a positive weight and the number
+    of characters with a negative weight."""
     if len(x) == 0:
-        raise ValueError(f"invalid literal: {x}")
-    x_ = x.translate(trans_map)
-    m = numeric_string_regex.match(x_)
-    if m is None or len(m[0]) == 0:
-        raise ValueError(f"invalid literal: {x}")
-    buf = 0
-    valid = False
-    for i, k in enumerate(
+        return 0.0, 0.0, 0
+    score = 0.0
+    plausible = 0
+    implausible = 0
+    for pattern, weight in _encoding_score_weights:
+        count = len(pattern.findall(x))
+        score += weight * count
+        if weight > 0:
+            plausible += count
+        else:
+            implausible += count
+    return score / len(x), plausible / len(x), implausible
+
+
+_large_numeral_units = {
+    name: i + 1
+    for i, name in enumerate(
         [
-            "一",
             "万",
             "億",
             "兆",
@@ -165,31 +295,358 @@ def to_numeric(x: str) -> Union[float, int]:
             "不可思議",
             "無量大数",
         ]
-    ):
-        digits = m[k]
-        if digits is None:
+    )
+}
+_large_numeral_units_by_initial = {name[0]: (name, exponent) for name, exponent in _large_numeral_units.items()}
+_basic_number_chars = frozenset("0123456789,.")
+_numeral_run_regex = re.compile(
+    "[0-9,.{}]+".format("".join(sorted(set("".join(small_numeral_units) + "".join(_large_numeral_units)))))
+)
+
+
+@overload
+def to_numeric(x: str, exact: "Literal[False]" = ...) -> Union[float, int]:
+    ...
+
+
+@overload
+def to_numeric(x: str, exact: bool) -> Union[float, int, Decimal]:
+    ...
+
+
+def to_numeric(x: str, exact: bool = False) -> Union[float, int, Decimal]:
+    """Parse a number written in arabic and/or kanji numerals.
+
+    Plain ASCII numbers are parsed directly. Anything else is translated to arabic digits and scanned once from left
+    to right, splitting it at the units 千, 百 and 十 and at the myriad units 万, 億, 兆 and so on.
+
+    Args:
+        x (str): A number such as `"-1,234.5"`, `"2.3万"` or `"六十六兆二千億"`.
+        exact (bool): If `True`, compute the value with integers only and return a `Decimal` instead of a `float`
+            when it is not integral, so that no precision is lost.
+
+    Returns:
+        Union[float, int, Decimal]: The value, as an `int` when it is integral.
+
+    Raises:
+        TypeError: If `x` is not a string.
+        ValueError: If `x` is not a number.
+
+    >>> to_numeric("1京2858兆0519億6763万3865")
+    12858051967633865
+    >>> to_numeric("1.1無量大数", exact=True) == 11 * 10 ** 67
+    True
+    >>> to_numeric("0.1万0.01", exact=True)
+    Decimal('1000.01')
+    """
+    if not isinstance(x, str):
+        raise TypeError(f"to_numeric() argument must be a string, not '{type(x)}'")
+    value = _parse_numeric(x, exact)
+    if value is None:
+        raise ValueError(f"invalid literal: {x}")
+    return value
+
+
+def to_numeric_many(values: Iterable[Any], errors: str = "raise", exact: bool = False) -> List[Any]:
+    """Apply `to_numeric` to each of `values`, such as a column of a spreadsheet.
+
+    Each distinct value is parsed only once, and invalid values are handled without raising and catching an exception
+    per value.
+
+    Args:
+        values (Iterable[Any]): Values to parse, e.g. a list or a `pandas.Series`.
+        errors (str): `"raise"` to raise an error on an invalid value, `"coerce"` to replace it with NaN, or `"ignore"`
+            to leave it as is.
+        exact (bool): See `to_numeric`.
+
+    Returns:
+        List[Any]: Parsed values in the same order as `values`.
+
+    Raises:
+        ValueError: Invalid `errors`, or an invalid value while `errors` is `"raise"`.
+        TypeError: A value which is not a string while `errors` is `"raise"`.
+
+    >>> to_numeric_many(["1,234", "１２３", "3億5千万", "1,234", "-"], errors="coerce")
+    [1234, 123, 350000000, 1234, nan]
+    """
+    if errors not in ("raise", "coerce", "ignore"):
+        raise ValueError(f"errors must be 'raise', 'coerce' or 'ignore', not '{errors}'")
+    memo: Dict[str, Optional[Union[float, int, Decimal]]] = {}
+    retval: List[Any] = []
+    for x in values:
+        if not isinstance(x, str):
+            if errors == "raise":
+                raise TypeError(f"to_numeric() argument must be a string, not '{type(x)}'")
+            retval.append(math.nan if errors == "coerce" else x)
             continue
-        if len(digits) > 0:
-            buf += _parse_sen_digits(digits) * (10000**i)
+        if x in memo:
+            value = memo[x]
+        else:
+            value = memo[x] = _parse_numeric(x, exact)
+        if value is None:
+            if errors == "raise":
+                raise ValueError(f"invalid literal: {x}")
+            retval.append(math.nan if errors == "coerce" else x)
+        else:
+            retval.append(value)
+    return retval
+
+
+@overload
+def find_numerics(
+    x: str, exact: "Literal[False]" = ...
+) -> Generator[Tuple[Tuple[int, int], Union[float, int]], None, None]:
+    ...
+
+
+@overload
+def find_numerics(x: str, exact: bool) -> Generator[Tuple[Tuple[int, int], Union[float, int, Decimal]], None, None]:
+    ...
+
+
+def find_numerics(
+    x: str, exact: bool = False
+) -> Generator[Tuple[Tuple[int, int], Union[float, int, Decimal]], None, None]:
+    """Find numbers written in arabic and/or kanji numerals in free text.
+
+    The text is translated once and scanned from left to right, taking the longest number at each position, so the
+    whole scan is linear in the length of `x`. Every span is accepted by `to_numeric`, except that a number never
+    starts with `,` or with a myriad unit such as 万. A `-` right before a number is taken as its sign unless it
+    follows an alphanumeric ASCII character, as in `"2020-10"`. Kanji numerals are found regardless of the
+    surrounding words, e.g. the 一 in 一般.
+
+    Args:
+        x (str): Text to search.
+        exact (bool): See `to_numeric`.
+
+    Returns:
+        Generator[Tuple[Tuple[int, int], Union[float, int, Decimal]], None, None]: `(span, value)` of each number.
+
+    >>> list(find_numerics("合計３億５千万円（税込）、-1,200.5ドル"))
+    [((2, 7), 350000000), ((13, 21), -1200.5)]
+    """
+    x_ = x.translate(trans_map)
+    for run in _numeral_run_regex.finditer(x_):
+        i, end = run.span()
+        while i < end:
+            j = _match_numeral(x_, i, end)
+            if j == i:
+                i += 1
+                continue
+            start = i
+            if i == run.start() and i > 0 and x_[i - 1] == "-":
+                if i == 1 or not (_isascii(x_[i - 2]) and x_[i - 2].isalnum()):
+                    start = i - 1
+            value = _parse_numeric(x[start:j], exact)
+            if value is not None:
+                yield (start, j), value
+            i = j
+
+
+_basic_number_state_empty = 0
+_basic_number_state_integer = 1
+_basic_number_state_comma = 2
+_basic_number_state_dot = 3
+_basic_number_state_fraction = 4
+_basic_number_accepting_states = frozenset(
+    [_basic_number_state_empty, _basic_number_state_integer, _basic_number_state_fraction]
+)
+
+
+def _match_numeral(x: str, begin: int, end: int) -> int:
+    """Return the end of the longest number in `x[begin:end]` starting at `begin`, or `begin` if there is none.
+
+    `x` must be translated by `trans_map`. This is a deterministic automaton for the grammar of `to_numeric`, which
+    never looks back, so the cost is linear in the length of the match plus a few characters.
+    """
+    last_accept = begin
+    large_bound = len(_large_numeral_units) + 1
+    small_bound = len(small_numeral_units) + 1
+    state = _basic_number_state_empty
+    digits = 0
+    group_empty = True
+    i = begin
+    while i < end:
+        c = x[i]
+        if "0" <= c <= "9":
+            if state == _basic_number_state_empty or state == _basic_number_state_integer:
+                state = _basic_number_state_integer
+                digits += 1
+            elif state == _basic_number_state_comma:
+                if digits == 3:
+                    break
+                digits += 1
+            else:
+                state = _basic_number_state_fraction
+        elif c == ",":
+            if not (state == _basic_number_state_integer or state == _basic_number_state_comma) or (
+                digits > 3 if state == _basic_number_state_integer else digits != 3
+            ):
+                break
+            state = _basic_number_state_comma
+            digits = 0
+        elif c == ".":
+            if not (
+                state == _basic_number_state_empty
+                or state == _basic_number_state_integer
+                or (state == _basic_number_state_comma and digits == 3)
+            ):
+                break
+            state = _basic_number_state_dot
+        elif c in small_numeral_units:
+            place = small_numeral_units[c]
+            if place >= small_bound or not _is_accepting(state, digits):
+                break
+            small_bound = place
+            state = _basic_number_state_empty
+            digits = 0
+        else:
+            unit = _large_numeral_units_by_initial.get(c)
+            if (
+                unit is None
+                or not x.startswith(unit[0], i, end)
+                or unit[1] >= large_bound
+                or group_empty
+                or not _is_accepting(state, digits)
+            ):
+                break
+            large_bound = unit[1]
+            small_bound = len(small_numeral_units) + 1
+            state = _basic_number_state_empty
+            digits = 0
+            group_empty = True
+            i += len(unit[0])
+            last_accept = i
+            continue
+        group_empty = False
+        i += 1
+        if _is_accepting(state, digits):
+            last_accept = i
+    return last_accept
+
+
+def _is_accepting(state: int, digits: int) -> bool:
+    return state in _basic_number_accepting_states or (state == _basic_number_state_comma and digits == 3)
+
+
+def _parse_numeric(x: str, exact: bool = False) -> Optional[Union[float, int, Decimal]]:
+    """`to_numeric` which returns `None` instead of raising `ValueError`."""
+    try:
+        return _scan_numeric(x, exact)
+    except ValueError:  # more digits than `sys.get_int_max_str_digits()`
+        return None
+
+
+def _scan_numeric(x: str, exact: bool) -> Optional[Union[float, int, Decimal]]:
+    if _isascii(x):
+        digits = x[1:] if x.startswith("-") else x
+        if digits.isdigit():
+            return int(x)
+        number = split_basic_number(digits)
+        if number is None or len(digits) == 0:
+            return None
+        value = _exact_value(*_basic_number_to_fraction(*number)) if exact else _basic_number_to_float(*number)
+        return -value if len(digits) < len(x) else value
+    x_ = x.translate(trans_map)
+    sign = 1
+    start = 0
+    if x_.startswith("-"):
+        sign = -1
+        start = 1
+    groups = _scan_numeral_groups(x_, start)
+    if groups is None:
+        return None
+    buf: Union[float, int] = 0
+    coefficient, scale = 0, 0
+    valid = False
+    for exponent, group in groups:
+        if len(group) > 0:
+            terms = split_sen_digits(group)
+            if terms is None:
+                return None
+            if exact:
+                c, s = _sen_digits_to_fraction(terms)
+                if s > scale:
+                    coefficient *= 10 ** (s - scale)
+                    scale = s
+                coefficient += c * 10 ** (4 * exponent + scale - s)
+            else:
+                buf += _sen_digits_to_float(terms) * (10000**exponent)
             valid = True
     if not valid:
-        raise ValueError(f"invalid literal: {x}")
-    return (-1 if m["minus"] is not None else 1) * buf
-
-
-def _parse_sen_digits(x: str) -> Union[float, int]:
-    m = _four_digits_string_regex.match(x)
-    if m is not None:
-        s = (
-            (0 if m["千"] is None else (1 if len(m["千"]) == 0 else float(m["千"].replace(",", "")))) * 1000
-            + (0 if m["百"] is None else (1 if len(m["百"]) == 0 else float(m["百"].replace(",", "")))) * 100
-            + (0 if m["十"] is None else (1 if len(m["十"]) == 0 else float(m["十"].replace(",", "")))) * 10
-            + (0 if m["一"] is None or len(m["一"]) == 0 else float(m["一"].replace(",", "")))
-        )
-        if s == math.floor(s):
-            return int(s)
-        return s
-    return 0
+        return None
+    if exact:
+        return _exact_value(sign * coefficient, scale)
+    return sign * buf
+
+
+def _scan_numeral_groups(x: str, start: int) -> Optional[List[Tuple[int, str]]]:
+    """Split `x[start:]` at the myriad units into `(exponent, digits)` pairs, smallest unit first.
+
+    Returns `None` if `x` contains anything but digits, `,`, `.`, 千, 百, 十 and the myriad units, or if the myriad
+    units are not strictly decreasing.
+    """
+    groups: List[Tuple[int, str]] = []
+    last_exponent = len(_large_numeral_units) + 1
+    group_start = start
+    i = start
+    n = len(x)
+    while i < n:
+        c = x[i]
+        if c in _basic_number_chars or c in small_numeral_units:
+            i += 1
+            continue
+        unit = _large_numeral_units_by_initial.get(c)
+        if unit is None or not x.startswith(unit[0], i) or unit[1] >= last_exponent:
+            return None
+        last_exponent = unit[1]
+        groups.append((last_exponent, x[group_start:i]))
+        i += len(unit[0])
+        group_start = i
+    groups.append((0, x[group_start:]))
+    groups.reverse()
+    return groups
+
+
+def _sen_digits_to_float(terms: Dict[int, Tuple[str, str]]) -> Union[float, int]:
+    values = {place: float(_basic_number_to_float(*number)) for place, number in terms.items()}
+    s = values.get(3, 0) * 1000 + values.get(2, 0) * 100 + values.get(1, 0) * 10 + values.get(0, 0)
+    if s == math.floor(s):
+        return int(s)
+    return s
+
+
+def _sen_digits_to_fraction(terms: Dict[int, Tuple[str, str]]) -> Tuple[int, int]:
+    """Sum up split numbers as `(coefficient, scale)`, meaning `coefficient / 10 ** scale`."""
+    scale = max(len(fraction) for _, fraction in terms.values())
+    coefficient = 0
+    for place, (integer, fraction) in terms.items():
+        coefficient += int(integer + fraction or "0") * 10 ** (place + scale - len(fraction))
+    return coefficient, scale
+
+
+def _basic_number_to_float(integer: str, fraction: str) -> Union[float, int]:
+    if len(fraction) == 0:
+        return int(integer) if len(integer) > 0 else 0
+    s = float(f"{integer}.{fraction}")
+    if s == math.floor(s):
+        return int(s)
+    return s
+
+
+def _basic_number_to_fraction(integer: str, fraction: str) -> Tuple[int, int]:
+    return int(integer + fraction or "0"), len(fraction)
+
+
+def _exact_value(coefficient: int, scale: int) -> Union[int, Decimal]:
+    """Convert `coefficient / 10 ** scale` to an `int` if it is integral, or to a `Decimal` otherwise."""
+    if scale == 0:
+        return coefficient
+    unit: int = 10**scale
+    q, r = divmod(coefficient, unit)
+    if r == 0:
+        return q
+    return Decimal(f"{coefficient}e-{scale}")
 
 
 normalize_trans_map = str.maketrans(
@@ -225,25 +682,318 @@ def normalize(
     remove_multiple_spaces: bool = False,
     remove_variation_selectors: bool = False,
 ) -> str:
-    normalized_string = parentheses_right.sub(
-        r") \1", parentheses_left.sub(r"\1 (", unicodedata.normalize("NFKC", x).translate(normalize_trans_map))
+    return get_normalizer(newline_to_space, remove_multiple_spaces, remove_variation_selectors)(x)
+
+
+if sys.version_info >= (3, 7):
+    _isascii = str.isascii
+else:
+
+    def _isascii(x: str) -> bool:
+        return all(ord(c) < 128 for c in x)
+
+
+class Normalizer(Callable[str, str]):
+    """Precompiled `normalize` for a fixed set of options.
+
+    Character replacements, including `newline_to_space`, are folded into one translation table, and the spacing
+    around parentheses and `remove_multiple_spaces` are applied by one regular expression substitution. NFKC
+    normalization is skipped for pure ASCII input, which it never changes. The output is identical to `normalize`.
+
+    >>> Normalizer(newline_to_space=True)("ｶﾀｶﾅ（かっこ）\\n")
+    'カタカナ (かっこ) '
+    """
+
+    def __init__(
+        self,
+        newline_to_space: bool = False,
+        remove_multiple_spaces: bool = False,
+        remove_variation_selectors: bool = False,
+    ) -> None:
+        self._trans_map = dict(normalize_trans_map)
+        if newline_to_space:
+            self._trans_map.update(str.maketrans({"\n": " ", "\r": " "}))
+        self._translated_chars = re.compile("[" + "".join(re.escape(chr(c)) for c in self._trans_map) + "]")
+        # Spaces are inserted as zero-width matches so that the replacement is a plain literal. The lookarounds see the
+        # input before any insertion, which matches applying the left and right rules one after the other as long as
+        # `)(` is left to the left rule.
+        pattern = r"(?=\()(?<=[^\s(])|(?<=\))(?=[^\s)(])"
+        if remove_multiple_spaces:
+            pattern += r"| {2,}"
+        self._spacing = re.compile(pattern)
+        self._variation_selectors = re.compile(r"[\U000e0100-\U000e01ef]+") if remove_variation_selectors else None
+
+    def __call__(self, x: str) -> str:
+        is_ascii = _isascii(x)
+        normalized_string = x if is_ascii else unicodedata.normalize("NFKC", x)
+        if self._translated_chars.search(normalized_string) is not None:
+            normalized_string = normalized_string.translate(self._trans_map)
+        if "(" in normalized_string or ")" in normalized_string or "  " in normalized_string:
+            normalized_string = self._spacing.sub(" ", normalized_string)
+        if self._variation_selectors is not None and not is_ascii:
+            normalized_string = self._variation_selectors.sub("", normalized_string)
+        return normalized_string
+
+
+@lru_cache(maxsize=None)
+def get_normalizer(
+    newline_to_space: bool = False,
+    remove_multiple_spaces: bool = False,
+    remove_variation_selectors: bool = False,
+) -> Normalizer:
+    """Return a shared `Normalizer` for the options."""
+    return Normalizer(newline_to_space, remove_multiple_spaces, remove_variation_selectors)
+
+
+# Characters which are left as they are by every step of `normalize` and never combine with their neighbors.
+_inert_char = r"[0-9A-Za-z\u3041-\u3096\u30a1-\u30fa\u4e00-\u9fff]"
+# Positions where the input can be split without changing the result of `normalize`, searched from the end: after a
+# line feed, or between two inert characters. A line feed turns into a space with `newline_to_space`, so it is then
+# only a split point if an inert character follows and no run of spaces can span it.
+_stream_boundary_regex = regex.compile(rf"(?r)(?<=\n)|(?<={_inert_char})(?={_inert_char})")
+_stream_boundary_regex_with_newline_to_space = regex.compile(rf"(?r)(?<=[\n]|{_inert_char})(?={_inert_char})")
+# Length beyond which a block is also cut at any position accepted by `_is_fallback_boundary`, so that text without
+# line feeds or inert characters is not buffered whole.
+stream_block_max_length = 1 << 16
+
+
+def normalize_stream(
+    chunks: Iterable[str],
+    newline_to_space: bool = False,
+    remove_multiple_spaces: bool = False,
+    remove_variation_selectors: bool = False,
+    workers: Optional[int] = None,
+) -> Generator[str, None, None]:
+    """Normalize text given in chunks, yielding the result incrementally.
+
+    Each chunk is cut at the last position where splitting cannot affect NFKC composition, the spacing around
+    parentheses or the removal of multiple spaces, so that the concatenated output is identical to `normalize` of the
+    concatenated input. The rest is carried over to the next chunk. Such positions are looked for more thoroughly
+    once the carried-over text exceeds `stream_block_max_length` characters, which keeps memory bounded for text
+    without line feeds.
+
+    Args:
+        chunks (Iterable[str]): Text chunks of any size.
+        newline_to_space (bool): See `normalize`.
+        remove_multiple_spaces (bool): See `normalize`.
+        remove_variation_selectors (bool): See `normalize`.
+        workers (Optional[int]): Number of worker processes. Chunks are normalized in the calling process if omitted or
+            1; otherwise they are normalized on a process pool and yielded in order, with at most two chunks per
+            worker in flight.
+
+    Returns:
+        Generator[str, None, None]: Normalized text chunks.
+
+    >>> list(normalize_stream(["ｶﾀｶ", "ﾅ（か", "っこ）\\n", "文字列"]))
+    ['カタカナ (かっこ)\\n', '文字', '列']
+    """
+    blocks = _independent_blocks(chunks, newline_to_space and remove_multiple_spaces)
+    if workers is None or workers <= 1:
+        normalizer = get_normalizer(newline_to_space, remove_multiple_spaces, remove_variation_selectors)
+        for block in blocks:
+            yield normalizer(block)
+        return
+    normalize_block = partial(
+        normalize,
+        newline_to_space=newline_to_space,
+        remove_multiple_spaces=remove_multiple_spaces,
+        remove_variation_selectors=remove_variation_selectors,
     )
-    if newline_to_space:
-        normalized_string = re.sub(r"[\n\r]", " ", normalized_string)
-    if remove_multiple_spaces:
-        normalized_string = re.sub(r" +", " ", normalized_string)
-    if remove_variation_selectors:
-        normalized_string = re.sub(r"[\U000e0100-\U000e01ef]", "", normalized_string)
-    return normalized_string
+    yield from map_in_processes(normalize_block, blocks, workers)
+
+
+def _independent_blocks(chunks: Iterable[str], newline_to_space: bool) -> Generator[str, None, None]:
+    """Regroup text chunks into blocks which can be normalized independently of each other."""
+    boundary = _stream_boundary_regex_with_newline_to_space if newline_to_space else _stream_boundary_regex
+    buf = ""
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        # Positions before `start` have been searched already, by the fallback as well if the buffer was long.
+        start = max(len(buf) - 1, 0)
+        fallback_start = start if len(buf) > stream_block_max_length else 0
+        buf += chunk
+        m = boundary.search(buf, start)
+        if m is not None and m.start() > 0:
+            cut = m.start()
+        elif len(buf) > stream_block_max_length:
+            cut = _find_fallback_boundary(buf, fallback_start)
+        else:
+            continue
+        if cut > 0:
+            yield buf[:cut]
+            buf = buf[cut:]
+    if len(buf) > 0:
+        yield buf
+
+
+def _find_fallback_boundary(x: str, start: int) -> int:
+    """Return the last position after `start` where `x` can be split by `_is_fallback_boundary`, or 0."""
+    for i in range(len(x) - 1, max(start, 0), -1):
+        if _is_fallback_boundary(x, i):
+            return i
+    return 0
+
+
+# Number of characters before a split point which can compose with the character after it. A starter only composes
+# with the character composed from the run of starters right before it, and the longest such chains, such as Hangul
+# L+V+T or Kannada U+0CC6+U+0CC2+U+0CD5, have three characters.
+_composition_context = 3
+
+
+def _is_fallback_boundary(x: str, i: int) -> bool:
+    """Return whether `x` can be split before `x[i]` without changing `normalize`.
+
+    `x[i]` must decompose into a starter, and NFKC of the characters up to it must be the same whether it is split off
+    or not. Neither `x[i - 1]` nor `x[i]` may take part in the spacing around parentheses or in runs of spaces.
+    """
+    b = x[i]
+    if unicodedata.combining(unicodedata.normalize("NFKD", b)[0]) != 0:
+        return False
+    head = x[max(i - _composition_context, 0) : i]  # noqa: E203
+    if unicodedata.normalize("NFKC", head + b) != unicodedata.normalize("NFKC", head) + unicodedata.normalize(
+        "NFKC", b
+    ):
+        return False
+    return not any(c in " ()" for c in get_normalizer(newline_to_space=True)(x[i - 1] + b))
+
+
+_kakasi: Optional["pykakasi.kakasi"] = None
+_kakasi_lock = threading.Lock()
+
+
+def _get_kakasi() -> "pykakasi.kakasi":
+    """Return the converter shared by all transliteration functions, creating it on first use.
+
+    pykakasi is imported here too, as loading its dictionaries dominates the import time of this module.
+    """
+    global _kakasi
+    if _kakasi is None:
+        with _kakasi_lock:
+            if _kakasi is None:
+                import pykakasi
+
+                _kakasi = pykakasi.kakasi()
+    return _kakasi
 
 
 def kanji_to_kana(x: str) -> str:
-    return "".join(d["kana"] for d in kks.convert(x))
+    return "".join(d["kana"] for d in _get_kakasi().convert(x))
 
 
 def kanji_to_hiragana(x: str) -> str:
-    return "".join(d["hira"] for d in kks.convert(x))
+    return "".join(d["hira"] for d in _get_kakasi().convert(x))
 
 
 def kanji_to_romaji(x: str) -> str:
-    return "".join(d["hepburn"] for d in kks.convert(x))
+    return "".join(d["hepburn"] for d in _get_kakasi().convert(x))
+
+
+transliteration_targets = ("orig", "kana", "hira", "hepburn", "kunrei", "passport")
+transliteration_cache_size: Optional[int] = 8192
+
+
+def transliterate(x: str, targets: Tuple[str, ...] = ("kana", "hira", "hepburn")) -> Tuple[str, ...]:
+    """Transliterate text into several readings with one conversion.
+
+    Results are kept in an LRU cache of `transliteration_cache_size` entries, which holds every reading of a text, so
+    asking for other readings of a cached text does not convert it again. The cache is shared with
+    `cached_kanji_to_kana`, `cached_kanji_to_hiragana` and `cached_kanji_to_romaji`. `transliteration_cache_info`
+    reports its hits and misses, and `set_transliteration_cache_size` resizes it.
+
+    Args:
+        x (str): Text to transliterate.
+        targets (Tuple[str, ...]): Readings to return, out of `transliteration_targets`: `"kana"` for katakana,
+            `"hira"` for hiragana, `"hepburn"`, `"kunrei"` and `"passport"` for romaji, and `"orig"` for the original.
+
+    Returns:
+        Tuple[str, ...]: The readings in the order of `targets`.
+
+    Raises:
+        ValueError: Unknown target.
+
+    >>> transliterate("東京")
+    ('トウキョウ', 'とうきょう', 'toukyou')
+    """
+    indices = _transliteration_target_indices(targets)
+    readings = _transliterate_all(x)
+    return tuple(readings[i] for i in indices)
+
+
+def transliterate_many(
+    values: Iterable[str], targets: Tuple[str, ...] = ("kana", "hira", "hepburn")
+) -> List[Tuple[str, ...]]:
+    """Apply `transliterate` to each of `values`.
+
+    Args:
+        values (Iterable[str]): Texts to transliterate.
+        targets (Tuple[str, ...]): See `transliterate`.
+
+    Returns:
+        List[Tuple[str, ...]]: The readings of each text in the order of `values`.
+
+    Raises:
+        ValueError: Unknown target.
+
+    >>> transliterate_many(["東京", "大阪", "東京"], targets=("hepburn",))
+    [('toukyou',), ('oosaka',), ('toukyou',)]
+    """
+    indices = _transliteration_target_indices(targets)
+    memo: Dict[str, Tuple[str, ...]] = {}
+    retval = []
+    for x in values:
+        if x not in memo:
+            readings = _transliterate_all(x)
+            memo[x] = tuple(readings[i] for i in indices)
+        retval.append(memo[x])
+    return retval
+
+
+def transliteration_cache_info() -> _CacheInfo:
+    """Return the hits, misses, maximum size and current size of the cache of `transliterate`."""
+    return _transliterate_all.cache_info()
+
+
+def clear_transliteration_cache() -> None:
+    """Empty the cache of `transliterate` and reset its statistics."""
+    _transliterate_all.cache_clear()
+
+
+def set_transliteration_cache_size(maxsize: Optional[int]) -> None:
+    """Resize the cache of `transliterate`, emptying it.
+
+    Args:
+        maxsize (Optional[int]): Maximum number of cached texts, or `None` for no limit.
+    """
+    global _transliterate_all, transliteration_cache_size
+    transliteration_cache_size = maxsize
+    _transliterate_all = lru_cache(maxsize=maxsize)(_convert_all)
+
+
+def _transliteration_target_indices(targets: Tuple[str, ...]) -> List[int]:
+    try:
+        return [transliteration_targets.index(t) for t in targets]
+    except ValueError:
+        raise ValueError(f"targets must be out of {transliteration_targets}, not {targets}") from None
+
+
+def _convert_all(x: str) -> Tuple[str, ...]:
+    converted = _get_kakasi().convert(x)
+    return tuple("".join(d[t] for d in converted) for t in transliteration_targets)
+
+
+_transliterate_all = lru_cache(maxsize=transliteration_cache_size)(_convert_all)
+
+
+# Memoized variants for inputs that repeat a lot, such as prefecture and city names in address data. They share the
+# cache of `transliterate`.
+def cached_kanji_to_kana(x: str) -> str:
+    return _transliterate_all(x)[transliteration_targets.index("kana")]
+
+
+def cached_kanji_to_hiragana(x: str) -> str:
+    return _transliterate_all(x)[transliteration_targets.index("hira")]
+
+
+def cached_kanji_to_romaji(x: str) -> str:
+    return _transliterate_all(x)[transliteration_targets.index("hepburn")]
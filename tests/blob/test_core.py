@@ -1,9 +1,20 @@
 import os
+import pathlib
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, List, Optional
 
+import pytest
 from pytest_mock import MockerFixture
 
 from jittok import blob
 
+if sys.version_info >= (3, 9):
+    from collections.abc import Generator
+else:
+    from typing import Generator
+
 work_dir = os.path.dirname(os.path.abspath(__file__))
 fixtures_dir = os.path.join(work_dir, "fixtures")
 
@@ -27,3 +38,148 @@ def test_save_resource_from_http_request_in_temporary_file(mocker: MockerFixture
         with open(sut.name, "rb") as fin:
             actual = fin.read()
     assert actual == b"test"
+
+
+def test_default_cache_dir_prefers_environment_variable(mocker: MockerFixture) -> None:
+    mocker.patch.dict(os.environ, {"JITTOK_CACHE_DIR": "/path/to/jittok", "XDG_CACHE_HOME": "/path/to/xdg"})
+    assert blob.default_cache_dir() == "/path/to/jittok"
+
+
+def test_default_cache_dir_falls_back_to_xdg_cache_home(mocker: MockerFixture) -> None:
+    mocker.patch.dict(os.environ, {"JITTOK_CACHE_DIR": "", "XDG_CACHE_HOME": "/path/to/xdg"})
+    assert blob.default_cache_dir() == os.path.join("/path/to/xdg", "jittok")
+
+
+def test_save_resource_from_http_request_in_temporary_file_copies_in_chunks(mocker: MockerFixture) -> None:
+    from io import BytesIO
+
+    body = BytesIO(b"0123456789")
+    read = mocker.spy(body, "read")
+    urlopen = mocker.patch("jittok.blob.core.urlopen")
+    urlopen.return_value.__enter__.return_value = body
+    with blob.save_resource_from_http_request_in_temporary_file("http://example.com", buffer_size=4) as sut:
+        actual = sut.read()
+    assert actual == b"0123456789"
+    assert read.call_count == 4
+    read.assert_called_with(4)
+
+
+def test_save_resource_from_http_request_in_temporary_file_verifies_checksum(mocker: MockerFixture) -> None:
+    import hashlib
+    from io import BytesIO
+
+    urlopen = mocker.patch("jittok.blob.core.urlopen")
+    urlopen.return_value.__enter__.return_value = BytesIO(b"test")
+    checksum = hashlib.sha256(b"test").hexdigest().upper()
+    with blob.save_resource_from_http_request_in_temporary_file("http://example.com", checksum=checksum) as sut:
+        actual = sut.read()
+    assert actual == b"test"
+
+
+def test_save_resource_from_http_request_in_temporary_file_raises_checksum_mismatch_error(
+    mocker: MockerFixture,
+) -> None:
+    from io import BytesIO
+
+    from jittok.blob.exceptions import ChecksumMismatchError
+
+    urlopen = mocker.patch("jittok.blob.core.urlopen")
+    urlopen.return_value.__enter__.return_value = BytesIO(b"test")
+    with pytest.raises(ChecksumMismatchError):
+        with blob.save_resource_from_http_request_in_temporary_file("http://example.com", checksum="00"):
+            ...
+
+
+class _ConditionalRequestHandler(BaseHTTPRequestHandler):
+    body = b"resource body"
+    etag = '"v1"'
+    last_modified = "Wed, 01 Mar 2023 00:00:00 GMT"
+    requests: List[Dict[str, Optional[str]]] = []
+
+    def do_GET(self) -> None:
+        self.requests.append(
+            {
+                "If-None-Match": self.headers.get("If-None-Match"),
+                "If-Modified-Since": self.headers.get("If-Modified-Since"),
+            }
+        )
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Last-Modified", self.last_modified)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        ...
+
+
+@pytest.fixture
+def http_server() -> Generator[str, None, None]:
+    _ConditionalRequestHandler.requests = []
+    _ConditionalRequestHandler.etag = '"v1"'
+    _ConditionalRequestHandler.body = b"resource body"
+    server = HTTPServer(("127.0.0.1", 0), _ConditionalRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/ken_all_rome.zip"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_cached_resource_revalidates_with_validators(http_server: str, tmp_path: pathlib.Path) -> None:
+    path = blob.fetch_cached_resource(http_server, str(tmp_path))
+    with open(path, "rb") as fin:
+        assert fin.read() == b"resource body"
+    assert blob.fetch_cached_resource(http_server, str(tmp_path)) == path
+    with open(path, "rb") as fin:
+        assert fin.read() == b"resource body"
+    assert _ConditionalRequestHandler.requests == [
+        {"If-None-Match": None, "If-Modified-Since": None},
+        {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Mar 2023 00:00:00 GMT"},
+    ]
+
+
+def test_fetch_cached_resource_updates_modified_resource(http_server: str, tmp_path: pathlib.Path) -> None:
+    path = blob.fetch_cached_resource(http_server, str(tmp_path))
+    _ConditionalRequestHandler.etag = '"v2"'
+    _ConditionalRequestHandler.body = b"new resource body"
+    assert blob.fetch_cached_resource(http_server, str(tmp_path)) == path
+    with open(path, "rb") as fin:
+        assert fin.read() == b"new resource body"
+
+
+def test_fetch_cached_resource_offline(http_server: str, tmp_path: pathlib.Path) -> None:
+    from jittok.blob.exceptions import ResourceNotCachedError
+
+    with pytest.raises(ResourceNotCachedError):
+        blob.fetch_cached_resource(http_server, str(tmp_path), offline=True)
+    path = blob.fetch_cached_resource(http_server, str(tmp_path))
+    assert blob.fetch_cached_resource(http_server, str(tmp_path), offline=True) == path
+    assert len(_ConditionalRequestHandler.requests) == 1
+
+
+def test_fetch_cached_resource_falls_back_to_cache_when_unreachable(
+    http_server: str, tmp_path: pathlib.Path, mocker: MockerFixture
+) -> None:
+    from urllib.error import URLError
+
+    path = blob.fetch_cached_resource(http_server, str(tmp_path))
+    mocker.patch("jittok.blob.core.urlopen", side_effect=URLError("unreachable"))
+    assert blob.fetch_cached_resource(http_server, str(tmp_path)) == path
+    with pytest.raises(URLError):
+        blob.fetch_cached_resource("http://127.0.0.1/other.zip", str(tmp_path))
+
+
+@pytest.mark.skipif(os.name != "posix", reason="File modes are POSIX only")
+def test_fetch_cached_resource_honors_umask(http_server: str, tmp_path: pathlib.Path) -> None:
+    umask = os.umask(0o027)
+    try:
+        path = blob.fetch_cached_resource(http_server, str(tmp_path))
+    finally:
+        os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o640
@@ -1,4 +1,11 @@
 import os
+import pathlib
+import sys
+import threading
+import time
+import zipfile
+from typing import List, Optional
+from unittest.mock import MagicMock, call
 
 import pytest
 from pytest_mock import MockerFixture
@@ -89,25 +96,40 @@ def test_address_lookup_from_csv_string_iterable() -> None:
 def test_address_lookup_from_csv_local_zipfile(mocker: MockerFixture) -> None:
     open_zipfile = mocker.patch("jittok.jpaddress.core.open_zipfile")
     from_csv_string_iterable = mocker.patch("jittok.jpaddress.AddressLookup.from_csv_string_iterable")
-    codecs = mocker.patch("jittok.jpaddress.core.codecs")
+    decode_stream = mocker.patch("jittok.jpaddress.core.jptext.decode_stream")
+    split_lines = mocker.patch("jittok.jpaddress.core.jptext.split_lines")
     actual = jpaddress.AddressLookup.from_csv_local_zipfile("zipfile.zip", "zipcode.csv")
     assert actual == from_csv_string_iterable.return_value
     open_zipfile.assert_called_once_with("zipfile.zip", "zipcode.csv")
-    codecs.getreader.assert_called_once_with("utf-8")
-    from_csv_string_iterable.assert_called_once_with(codecs.getreader.return_value.return_value)
-    codecs.getreader.return_value.assert_called_once_with(open_zipfile.return_value.__enter__.return_value)
+    decode_stream.assert_called_once_with(open_zipfile.return_value.__enter__.return_value, encoding="utf-8")
+    split_lines.assert_called_once_with(decode_stream.return_value)
+    from_csv_string_iterable.assert_called_once_with(split_lines.return_value)
 
 
 def test_address_lookup_from_csv_local_zipfile_accepts_encoding(mocker: MockerFixture) -> None:
     open_zipfile = mocker.patch("jittok.jpaddress.core.open_zipfile")
     from_csv_string_iterable = mocker.patch("jittok.jpaddress.AddressLookup.from_csv_string_iterable")
-    codecs = mocker.patch("jittok.jpaddress.core.codecs")
+    decode_stream = mocker.patch("jittok.jpaddress.core.jptext.decode_stream")
+    split_lines = mocker.patch("jittok.jpaddress.core.jptext.split_lines")
     actual = jpaddress.AddressLookup.from_csv_local_zipfile("zipfile.zip", "zipcode.csv", encoding="euc-jp")
     assert actual == from_csv_string_iterable.return_value
     open_zipfile.assert_called_once_with("zipfile.zip", "zipcode.csv")
-    codecs.getreader.assert_called_once_with("euc-jp")
-    from_csv_string_iterable.assert_called_once_with(codecs.getreader.return_value.return_value)
-    codecs.getreader.return_value.assert_called_once_with(open_zipfile.return_value.__enter__.return_value)
+    decode_stream.assert_called_once_with(open_zipfile.return_value.__enter__.return_value, encoding="euc-jp")
+    split_lines.assert_called_once_with(decode_stream.return_value)
+    from_csv_string_iterable.assert_called_once_with(split_lines.return_value)
+
+
+def test_address_lookup_from_csv_local_zipfile_guesses_encoding(mocker: MockerFixture, tmp_path: pathlib.Path) -> None:
+    wd = os.path.dirname(__file__)
+    with open(os.path.join(wd, "fixtures", "zipcode.csv"), "r", encoding="utf-8", newline="") as fin:
+        csv_text = fin.read().replace("～", "〜")
+    with zipfile.ZipFile(tmp_path / "zipcode.zip", "w") as z:
+        z.writestr("zipcode.csv", csv_text.encode("euc_jp"))
+    mocker.patch("jittok.jptext.core.encoding_sample_size", 64)
+    actual = jpaddress.AddressLookup.from_csv_local_zipfile(
+        str(tmp_path / "zipcode.zip"), "zipcode.csv", encoding="auto"
+    )
+    assert actual == jpaddress.AddressLookup.from_csv_string_iterable(csv_text.splitlines(keepends=True))
 
 
 def test_address_lookup_from_csv_remote_zipfile(mocker: MockerFixture) -> None:
@@ -143,11 +165,14 @@ def test_address_lookup_from_csv_remote_zipfile_accepts_encoding(mocker: MockerF
 
 
 def test_from_japanpost_zipfile(mocker: MockerFixture) -> None:
-    from_csv_remote_zipfile = mocker.patch("jittok.jpaddress.AddressLookup.from_csv_remote_zipfile")
+    from_csv_cached_remote_zipfile = mocker.patch("jittok.jpaddress.AddressLookup.from_csv_cached_remote_zipfile")
     actual = jpaddress.AddressLookup.from_japanpost_zipfile()
-    assert actual == from_csv_remote_zipfile.return_value
-    from_csv_remote_zipfile.assert_called_once_with(
-        "https://www.post.japanpost.jp/zipcode/dl/roman/ken_all_rome.zip", "KEN_ALL_ROME.csv", encoding="CP932"
+    assert actual == from_csv_cached_remote_zipfile.return_value
+    from_csv_cached_remote_zipfile.assert_called_once_with(
+        "https://www.post.japanpost.jp/zipcode/dl/roman/ken_all_rome.zip",
+        "KEN_ALL_ROME.csv",
+        encoding="CP932",
+        cache_dir=None,
     )
 
 
@@ -284,3 +309,590 @@ def test_address_lookup_getitem_removes_hyphen() -> None:
     expected = address
     actual = sut["001-0000"]
     assert actual == expected
+
+
+def test_address_lookup_snapshot_roundtrip(tmp_path: pathlib.Path) -> None:
+    wd = os.path.dirname(__file__)
+    with open(os.path.join(wd, "fixtures", "zipcode.csv"), "r", encoding="utf-8") as fin:
+        expected = jpaddress.AddressLookup.from_csv_string_iterable(fin)
+    path = str(tmp_path / "snapshot" / "zipcode.jtkaddr")
+    expected.save_snapshot(path)
+    actual = jpaddress.AddressLookup.load_snapshot(path)
+    assert isinstance(actual, jpaddress.AddressLookup)
+    assert actual == expected
+    assert actual["064-0941"] == expected["0640941"]
+
+
+def test_address_lookup_snapshot_roundtrip_empty(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / "empty.jtkaddr")
+    jpaddress.AddressLookup([]).save_snapshot(path)
+    actual = jpaddress.AddressLookup.load_snapshot(path)
+    assert len(actual) == 0
+
+
+@pytest.mark.skipif(os.name != "posix", reason="File modes are POSIX only")
+def test_address_lookup_save_snapshot_honors_umask(tmp_path: pathlib.Path) -> None:
+    path = str(tmp_path / "zipcode.jtkaddr")
+    umask = os.umask(0o027)
+    try:
+        jpaddress.AddressLookup([]).save_snapshot(path)
+    finally:
+        os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+
+@pytest.mark.parametrize(
+    ["content"],
+    [
+        [b""],
+        [b"not a snapshot at all, just some random bytes"],
+        [jpaddress.core._snapshot_header.pack(jpaddress.core._snapshot_magic, 0, 0, 0, 0, 0)],
+        [jpaddress.core._snapshot_header.pack(jpaddress.core._snapshot_magic, 2, 0, 0, 0, 0)],
+        [jpaddress.core._snapshot_header.pack(jpaddress.core._snapshot_magic, 3, 1, 1, 0, 0)],
+    ],
+)
+def test_address_lookup_load_snapshot_raises_snapshot_format_error(tmp_path: pathlib.Path, content: bytes) -> None:
+    from jittok.jpaddress.exceptions import SnapshotFormatError
+
+    path = tmp_path / "broken.jtkaddr"
+    path.write_bytes(content)
+    with pytest.raises(SnapshotFormatError):
+        jpaddress.AddressLookup.load_snapshot(str(path))
+
+
+def _corrupt_snapshot(path: str, corruption: str) -> None:
+    with open(path, "rb") as fin:
+        buf = bytearray(fin.read())
+    _, _, string_count, record_count, pool_size, _ = jpaddress.core._snapshot_header.unpack_from(buf)
+    pool_offset = jpaddress.core._snapshot_header.size + (string_count + 1) * 4
+    if corruption == "pool":
+        buf[pool_offset] = 0xFF
+    else:
+        jpaddress.core._snapshot_uint32.pack_into(buf, pool_offset + pool_size, string_count)
+    with open(path, "wb") as fout:
+        fout.write(buf)
+
+
+@pytest.mark.parametrize(["corruption"], [["pool"], ["records"]])
+def test_address_lookup_load_snapshot_raises_snapshot_format_error_when_corrupted(
+    tmp_path: pathlib.Path, corruption: str
+) -> None:
+    from jittok.jpaddress.exceptions import SnapshotFormatError
+
+    path = str(tmp_path / "broken.jtkaddr")
+    jpaddress.AddressLookup(
+        [jpaddress.Address("0010000", "北海道", "札幌市", "南", "", "", "", "北海道", "札幌市", "南", "", "", "")]
+    ).save_snapshot(path)
+    _corrupt_snapshot(path, corruption)
+    with pytest.raises(SnapshotFormatError):
+        jpaddress.AddressLookup.load_snapshot(path)
+    with jpaddress.MappedAddressLookup(path) as sut:
+        with pytest.raises(SnapshotFormatError):
+            sut["0010000"]
+
+
+@pytest.mark.parametrize(["corruption"], [["pool"], ["records"]])
+def test_address_lookup_from_cached_japanpost_zipfile_rebuilds_corrupted_snapshot(
+    mocker: MockerFixture, tmp_path: pathlib.Path, corruption: str
+) -> None:
+    expected = jpaddress.AddressLookup(
+        [jpaddress.Address("0010000", "北海道", "札幌市", "南", "", "", "", "北海道", "札幌市", "南", "", "", "")]
+    )
+    path = str(tmp_path / "ken_all_rome.jtkaddr")
+    expected.save_snapshot(path)
+    _corrupt_snapshot(path, corruption)
+    from_japanpost_zipfile = mocker.patch(
+        "jittok.jpaddress.AddressLookup.from_japanpost_zipfile", return_value=expected
+    )
+    actual = jpaddress.AddressLookup.from_cached_japanpost_zipfile(str(tmp_path))
+    assert actual == expected
+    from_japanpost_zipfile.assert_called_once_with(cache_dir=str(tmp_path))
+    assert jpaddress.AddressLookup.load_snapshot(path) == expected
+
+
+def test_address_lookup_from_cached_japanpost_zipfile_builds_and_saves_snapshot(
+    mocker: MockerFixture, tmp_path: pathlib.Path
+) -> None:
+    wd = os.path.dirname(__file__)
+    with open(os.path.join(wd, "fixtures", "zipcode.csv"), "r", encoding="utf-8") as fin:
+        expected = jpaddress.AddressLookup.from_csv_string_iterable(fin)
+    from_japanpost_zipfile = mocker.patch(
+        "jittok.jpaddress.AddressLookup.from_japanpost_zipfile", return_value=expected
+    )
+    actual = jpaddress.AddressLookup.from_cached_japanpost_zipfile(str(tmp_path))
+    assert actual == expected
+    from_japanpost_zipfile.assert_called_once_with(cache_dir=str(tmp_path))
+    from_japanpost_zipfile.reset_mock()
+    actual = jpaddress.AddressLookup.from_cached_japanpost_zipfile(str(tmp_path))
+    assert actual == expected
+    from_japanpost_zipfile.assert_not_called()
+
+
+def test_address_lookup_from_cached_japanpost_zipfile_uses_default_cache_dir(
+    mocker: MockerFixture, tmp_path: pathlib.Path
+) -> None:
+    mocker.patch("jittok.jpaddress.core.default_cache_dir", return_value=str(tmp_path))
+    lookup = jpaddress.AddressLookup([])
+    load_snapshot = mocker.patch("jittok.jpaddress.AddressLookup._load_snapshot", return_value=(time.time(), lookup))
+    actual = jpaddress.AddressLookup.from_cached_japanpost_zipfile()
+    assert actual is lookup
+    load_snapshot.assert_called_once_with(os.path.join(str(tmp_path), "ken_all_rome.jtkaddr"))
+
+
+@pytest.mark.parametrize(["max_age", "rebuilt"], [[60 * 60, True], [None, False], [100 * 24 * 60 * 60, False]])
+def test_address_lookup_from_cached_japanpost_zipfile_rebuilds_stale_snapshot(
+    mocker: MockerFixture, tmp_path: pathlib.Path, max_age: Optional[float], rebuilt: bool
+) -> None:
+    old = jpaddress.AddressLookup([])
+    new = jpaddress.AddressLookup(
+        [jpaddress.Address("0010000", "北海道", "札幌市", "南", "", "", "", "北海道", "札幌市", "南", "", "", "")]
+    )
+    now = time.time()
+    mocker.patch("jittok.jpaddress.core.time.time", return_value=now - 2 * 24 * 60 * 60)
+    old.save_snapshot(str(tmp_path / "ken_all_rome.jtkaddr"))
+    mocker.patch("jittok.jpaddress.core.time.time", return_value=now)
+    from_japanpost_zipfile = mocker.patch("jittok.jpaddress.AddressLookup.from_japanpost_zipfile", return_value=new)
+    actual = jpaddress.AddressLookup.from_cached_japanpost_zipfile(str(tmp_path), max_age=max_age)
+    assert actual == (new if rebuilt else old)
+    assert from_japanpost_zipfile.call_count == (1 if rebuilt else 0)
+    with jpaddress.MappedAddressLookup.from_cached_japanpost_zipfile(str(tmp_path), max_age=max_age) as sut:
+        assert dict(sut.items()) == (new if rebuilt else old)
+        assert sut.built_at == int(now if rebuilt else now - 2 * 24 * 60 * 60)
+    assert from_japanpost_zipfile.call_count == (1 if rebuilt else 0)
+
+
+def test_zipcode_to_address_loads_cached_lookup(mocker: MockerFixture) -> None:
+    mocker.patch("jittok.jpaddress.core.address_lookup_cache", None)
+    mocker.patch("jittok.jpaddress.core.address_lookup_cache_dir", "/path/to/cache")
+    from_cached_japanpost_zipfile = mocker.patch("jittok.jpaddress.AddressLookup.from_cached_japanpost_zipfile")
+    actual = jpaddress.zipcode_to_address("1000001")
+    from_cached_japanpost_zipfile.assert_called_once_with("/path/to/cache")
+    assert actual == from_cached_japanpost_zipfile.return_value.__getitem__.return_value
+
+
+def test_zipcode_to_address_loads_cached_lookup_once_from_threads(mocker: MockerFixture) -> None:
+    mocker.patch("jittok.jpaddress.core.address_lookup_cache", None)
+    lookup = MagicMock()
+
+    def slow_load(cache_dir: Optional[str]) -> MagicMock:
+        time.sleep(0.05)
+        return lookup
+
+    from_cached_japanpost_zipfile = mocker.patch(
+        "jittok.jpaddress.AddressLookup.from_cached_japanpost_zipfile", side_effect=slow_load
+    )
+    threads = [threading.Thread(target=jpaddress.zipcode_to_address, args=("1000001",)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    from_cached_japanpost_zipfile.assert_called_once()
+    assert lookup.__getitem__.call_count == 4
+
+
+def test_mapped_address_lookup(tmp_path: pathlib.Path) -> None:
+    wd = os.path.dirname(__file__)
+    with open(os.path.join(wd, "fixtures", "zipcode.csv"), "r", encoding="utf-8") as fin:
+        expected = jpaddress.AddressLookup.from_csv_string_iterable(fin)
+    path = str(tmp_path / "zipcode.jtkaddr")
+    expected.save_snapshot(path)
+    with jpaddress.MappedAddressLookup(path) as sut:
+        assert len(sut) == len(expected)
+        assert list(sut) == sorted(expected)
+        assert dict(sut.items()) == expected
+        assert sut["064-0941"] == expected["0640941"]
+        assert "0600000" in sut
+        assert "0000000" not in sut
+        assert list(sut.search("旭ケ丘")) == [expected["0640941"]]
+
+
+@pytest.mark.parametrize(["zipcode"], [["0000000"], ["0600003"], ["9999999"], [""]])
+def test_mapped_address_lookup_raises_error_when_zipcode_is_not_found(tmp_path: pathlib.Path, zipcode: str) -> None:
+    from jittok.jpaddress.exceptions import ZipcodeNotFoundError
+
+    wd = os.path.dirname(__file__)
+    with open(os.path.join(wd, "fixtures", "zipcode.csv"), "r", encoding="utf-8") as fin:
+        lookup = jpaddress.AddressLookup.from_csv_string_iterable(fin)
+    path = str(tmp_path / "zipcode.jtkaddr")
+    lookup.save_snapshot(path)
+    with jpaddress.MappedAddressLookup(path) as sut:
+        with pytest.raises(ZipcodeNotFoundError):
+            sut[zipcode]
+
+
+@pytest.mark.parametrize(["content"], [[b""], [b"not a snapshot at all, just some random bytes"]])
+def test_mapped_address_lookup_raises_snapshot_format_error(tmp_path: pathlib.Path, content: bytes) -> None:
+    from jittok.jpaddress.exceptions import SnapshotFormatError
+
+    path = tmp_path / "broken.jtkaddr"
+    path.write_bytes(content)
+    with pytest.raises(SnapshotFormatError):
+        jpaddress.MappedAddressLookup(str(path))
+
+
+def test_mapped_address_lookup_from_cached_japanpost_zipfile(mocker: MockerFixture, tmp_path: pathlib.Path) -> None:
+    address = jpaddress.Address(
+        zipcode="0010000",
+        prefecture_kana="ホッカイドウ",
+        city_kana="サッポロシ",
+        town_kana="ミナミ",
+        prefecture_kanji="北海道",
+        city_kanji="札幌市",
+        town_kanji="南",
+        prefecture="北海道",
+        city="札幌市",
+        town="南",
+        prefecture_romaji="Hokkaido",
+        city_romaji="Sapporo-shi",
+        town_romaji="Minami",
+    )
+    from_japanpost_zipfile = mocker.patch(
+        "jittok.jpaddress.AddressLookup.from_japanpost_zipfile", return_value=jpaddress.AddressLookup([address])
+    )
+    with jpaddress.MappedAddressLookup.from_cached_japanpost_zipfile(str(tmp_path)) as sut:
+        assert sut["0010000"] == address
+    with jpaddress.MappedAddressLookup.from_cached_japanpost_zipfile(str(tmp_path)) as sut:
+        assert sut["0010000"] == address
+    from_japanpost_zipfile.assert_called_once_with(cache_dir=str(tmp_path))
+
+
+@pytest.fixture
+def fixture_address_lookup() -> jpaddress.AddressLookup:
+    wd = os.path.dirname(__file__)
+    with open(os.path.join(wd, "fixtures", "zipcode.csv"), "r", encoding="utf-8") as fin:
+        return jpaddress.AddressLookup.from_csv_string_iterable(fin)
+
+
+@pytest.mark.parametrize(
+    ["search_word", "expected"],
+    [
+        ["旭ケ丘", ["0640941"]],
+        ["アサヒガオカ", ["0640941"]],
+        ["asahigaoka", ["0640941"]],
+        ["Asahi", ["0640941"]],
+        ["旭", ["0640941"]],
+        ["大通", ["0600041", "0600042", "0640820"]],
+        ["存在しない", []],
+    ],
+)
+def test_address_lookup_search_uses_kanji_kana_and_romaji(
+    fixture_address_lookup: jpaddress.AddressLookup, search_word: str, expected: List[str]
+) -> None:
+    actual = [a.zipcode for a in fixture_address_lookup.search(search_word)]
+    assert actual == expected
+
+
+def test_address_lookup_search_ranks_exact_and_prefix_matches_first(
+    fixture_address_lookup: jpaddress.AddressLookup,
+) -> None:
+    actual = [a.zipcode for a in fixture_address_lookup.search("大通東")]
+    assert actual == ["0600041"]
+    actual = [a.town for a in fixture_address_lookup.search("北")]
+    assert actual[0] == ""
+    assert len(actual) == 10
+
+
+def test_address_search_index_ranks_like_a_full_sort(fixture_address_lookup: jpaddress.AddressLookup) -> None:
+    index = fixture_address_lookup.search_index
+    words = {g for level, name in index._names for g in [name, name[:1], name[:2], name[1:4]] if len(g) > 0}
+    for word in sorted(words):
+        names = [n for n in index._names if word in n[1]]
+        expected: List[str] = []
+        for name in sorted(names, key=lambda n: (n[1] != word, not n[1].startswith(word), n[0], n[1])):
+            expected.extend(sorted(index._names[name] - set(expected)))
+        assert list(index.search(word)) == expected
+
+
+def test_address_search_index_discards_every_posting(fixture_address_lookup: jpaddress.AddressLookup) -> None:
+    index = fixture_address_lookup.search_index
+    for address in list(fixture_address_lookup.values()):
+        index.discard(address)
+    assert (index._names, index._ngrams, index._prefixes) == ({}, {}, {})
+
+
+def test_address_lookup_search_paginates(fixture_address_lookup: jpaddress.AddressLookup) -> None:
+    expected = list(fixture_address_lookup.search("札幌"))
+    assert len(expected) == 10
+    assert list(fixture_address_lookup.search("札幌", limit=3)) == expected[:3]
+    assert list(fixture_address_lookup.search("札幌", limit=3, offset=3)) == expected[3:6]
+    assert list(fixture_address_lookup.search("", limit=2)) == list(fixture_address_lookup.values())[:2]
+
+
+def test_address_lookup_search_index_is_updated_incrementally(
+    fixture_address_lookup: jpaddress.AddressLookup,
+) -> None:
+    import dataclasses
+
+    assert [a.zipcode for a in fixture_address_lookup.search("旭ケ丘")] == ["0640941"]
+    renamed = dataclasses.replace(fixture_address_lookup["0640941"], town="朝日丘", town_romaji="Asahioka")
+    fixture_address_lookup["0640941"] = renamed
+    assert list(fixture_address_lookup.search("旭ケ丘")) == []
+    assert list(fixture_address_lookup.search("朝日丘")) == [renamed]
+    assert list(fixture_address_lookup.search("asahioka")) == [renamed]
+    del fixture_address_lookup["0640941"]
+    assert list(fixture_address_lookup.search("朝日丘")) == []
+
+
+def _modify_with_dict_methods(lookup: jpaddress.AddressLookup, method: str, address: jpaddress.Address) -> None:
+    if method == "update":
+        lookup.update({address.zipcode: address})
+    elif method == "update_kwargs":
+        lookup.update(**{address.zipcode: address})
+    elif method == "setdefault":
+        assert lookup.setdefault(address.zipcode, address) == address
+    elif method == "ior":
+        lookup |= {address.zipcode: address}
+
+
+@pytest.mark.parametrize(["method"], [["update"], ["update_kwargs"], ["setdefault"], ["ior"]])
+def test_address_lookup_search_index_follows_dict_methods_adding_addresses(
+    fixture_address_lookup: jpaddress.AddressLookup, method: str
+) -> None:
+    import dataclasses
+
+    if method == "ior" and sys.version_info < (3, 9):
+        pytest.skip("dict does not support |= before Python 3.9")
+    assert list(fixture_address_lookup.search("朝日丘")) == []
+    added = dataclasses.replace(fixture_address_lookup["0640941"], zipcode="0640942", town="朝日丘")
+    _modify_with_dict_methods(fixture_address_lookup, method, added)
+    assert list(fixture_address_lookup.search("朝日丘")) == [added]
+
+
+def test_address_lookup_search_index_follows_dict_methods_removing_addresses(
+    fixture_address_lookup: jpaddress.AddressLookup,
+) -> None:
+    removed = fixture_address_lookup["0640941"]
+    assert list(fixture_address_lookup.search("旭ケ丘")) == [removed]
+    assert fixture_address_lookup.pop("0640941") == removed
+    assert fixture_address_lookup.pop("0640941", None) is None
+    with pytest.raises(KeyError):
+        fixture_address_lookup.pop("0640941")
+    assert list(fixture_address_lookup.search("旭ケ丘")) == []
+    zipcode, address = fixture_address_lookup.popitem()
+    assert zipcode not in [a.zipcode for a in fixture_address_lookup.search(address.town)]
+    fixture_address_lookup.clear()
+    assert list(fixture_address_lookup.search("札幌")) == []
+    fixture_address_lookup[removed.zipcode] = removed
+    assert list(fixture_address_lookup.search("旭ケ丘")) == [removed]
+
+
+@pytest.mark.parametrize(
+    ["zip_prefix", "expected"],
+    [
+        [
+            "",
+            [
+                "0600000",
+                "0600001",
+                "0600002",
+                "0600031",
+                "0600032",
+                "0600041",
+                "0600042",
+                "0640820",
+                "0640821",
+                "0640941",
+            ],
+        ],
+        ["064", ["0640820", "0640821", "0640941"]],
+        ["060-00", ["0600000", "0600001", "0600002", "0600031", "0600032", "0600041", "0600042"]],
+        ["060-000", ["0600000", "0600001", "0600002"]],
+        ["060-0041", ["0600041"]],
+        ["06000410", []],
+        ["1", []],
+        ["059", []],
+    ],
+)
+def test_address_lookup_prefix_search(
+    fixture_address_lookup: jpaddress.AddressLookup, zip_prefix: str, expected: List[str]
+) -> None:
+    assert [a.zipcode for a in fixture_address_lookup.prefix_search(zip_prefix)] == expected
+    assert [a.zipcode for a in fixture_address_lookup.iter_prefix_search(zip_prefix)] == expected
+
+
+def test_address_lookup_prefix_search_follows_updates(fixture_address_lookup: jpaddress.AddressLookup) -> None:
+    import dataclasses
+
+    assert [a.zipcode for a in fixture_address_lookup.prefix_search("0600")] == [
+        "0600000",
+        "0600001",
+        "0600002",
+        "0600031",
+        "0600032",
+        "0600041",
+        "0600042",
+    ]
+    fixture_address_lookup["0600035"] = dataclasses.replace(fixture_address_lookup["0600031"], zipcode="0600035")
+    del fixture_address_lookup["0600001"]
+    assert [a.zipcode for a in fixture_address_lookup.prefix_search("060000")] == ["0600000", "0600002"]
+    assert [a.zipcode for a in fixture_address_lookup.prefix_search("060003")] == ["0600031", "0600032", "0600035"]
+
+
+def test_address_lookup_prefix_search_follows_dict_methods(fixture_address_lookup: jpaddress.AddressLookup) -> None:
+    import dataclasses
+
+    assert [a.zipcode for a in fixture_address_lookup.prefix_search("064")] == ["0640820", "0640821", "0640941"]
+    fixture_address_lookup.pop("064-0821")
+    assert [a.zipcode for a in fixture_address_lookup.prefix_search("064")] == ["0640820", "0640941"]
+    added = dataclasses.replace(fixture_address_lookup["0640941"], zipcode="0640942")
+    fixture_address_lookup.update({"064-0942": added})
+    assert [a.zipcode for a in fixture_address_lookup.prefix_search("064")] == ["0640820", "0640941", "0640942"]
+    assert fixture_address_lookup["0640942"] == added
+    assert "064-0942" not in list(fixture_address_lookup)
+    fixture_address_lookup.popitem()
+    assert len(fixture_address_lookup.prefix_search("")) == len(fixture_address_lookup)
+    fixture_address_lookup.clear()
+    assert fixture_address_lookup.prefix_search("0") == []
+
+
+def test_address_lookup_normalizes_keys_on_update(fixture_address_lookup: jpaddress.AddressLookup) -> None:
+    import dataclasses
+
+    assert fixture_address_lookup.sorted_zipcodes[0] == "0600000"
+    added = dataclasses.replace(fixture_address_lookup["0640941"], zipcode="1000003")
+    fixture_address_lookup["100-0003"] = added
+    assert fixture_address_lookup.prefix_search("100") == [added]
+    assert fixture_address_lookup.setdefault("100-0003", fixture_address_lookup["0640941"]) == added
+    del fixture_address_lookup["100-0003"]
+    assert fixture_address_lookup.prefix_search("100") == []
+    assert "1000003" not in fixture_address_lookup
+
+
+def test_mapped_address_lookup_prefix_search(
+    fixture_address_lookup: jpaddress.AddressLookup, tmp_path: pathlib.Path
+) -> None:
+    path = str(tmp_path / "zipcode.jtkaddr")
+    fixture_address_lookup.save_snapshot(path)
+    with jpaddress.MappedAddressLookup(path) as sut:
+        for zip_prefix in ["", "064", "060-000", "060-0041", "1"]:
+            assert sut.prefix_search(zip_prefix) == fixture_address_lookup.prefix_search(zip_prefix)
+            assert list(sut.iter_prefix_search(zip_prefix)) == fixture_address_lookup.prefix_search(zip_prefix)
+
+
+@pytest.mark.parametrize(
+    ["raw", "expected"],
+    [
+        ["0600041", "0600041"],
+        ["060-0041", "0600041"],
+        ["〒060-0041", "0600041"],
+        ["〒 ０６０－００４１", "0600041"],
+        ["０６０ー００４１", "0600041"],
+    ],
+)
+def test_normalize_zipcode(raw: str, expected: str) -> None:
+    assert jpaddress.normalize_zipcode(raw) == expected
+
+
+def test_zipcodes_to_addresses(mocker: MockerFixture, fixture_address_lookup: jpaddress.AddressLookup) -> None:
+    mocker.patch("jittok.jpaddress.core.address_lookup_cache", fixture_address_lookup)
+    actual = list(jpaddress.zipcodes_to_addresses(["〒０６０－００４１", "0000000", "064-0941", "0000000", "0600041"]))
+    assert actual == [
+        fixture_address_lookup["0600041"],
+        None,
+        fixture_address_lookup["0640941"],
+        None,
+        fixture_address_lookup["0600041"],
+    ]
+
+
+def test_zipcodes_to_addresses_raises_error_on_missing(
+    mocker: MockerFixture, fixture_address_lookup: jpaddress.AddressLookup
+) -> None:
+    from jittok.jpaddress.exceptions import ZipcodeNotFoundError
+
+    mocker.patch("jittok.jpaddress.core.address_lookup_cache", fixture_address_lookup)
+    sut = jpaddress.zipcodes_to_addresses(["0600041", "0000000"], on_missing="raise")
+    assert next(sut) == fixture_address_lookup["0600041"]
+    with pytest.raises(ZipcodeNotFoundError):
+        next(sut)
+    with pytest.raises(ValueError):
+        jpaddress.zipcodes_to_addresses(["0600041"], on_missing="skip")
+
+
+def test_zipcodes_to_address_columns(mocker: MockerFixture, fixture_address_lookup: jpaddress.AddressLookup) -> None:
+    mocker.patch("jittok.jpaddress.core.address_lookup_cache", fixture_address_lookup)
+    actual = jpaddress.zipcodes_to_address_columns(["064-0941", "0000000", "0600041"])
+    assert actual["zipcode"] == ["0640941", None, "0600041"]
+    assert actual["town"] == ["旭ケ丘", None, "大通東"]
+    assert actual["town_romaji"] == ["Asahigaoka", None, "Odorihigashi"]
+    assert len(actual) == 13
+    assert jpaddress.zipcodes_to_address_columns([])["zipcode"] == []
+
+
+def test_address_lookup_from_csv_string_iterable_reports_progress() -> None:
+    wd = os.path.dirname(__file__)
+    progress = MagicMock()
+    with open(os.path.join(wd, "fixtures", "zipcode.csv"), "r", encoding="utf-8") as fin:
+        actual = jpaddress.AddressLookup.from_csv_string_iterable(fin, chunk_size=4, progress=progress)
+    assert len(actual) == 10
+    progress.assert_has_calls([call(4), call(8), call(10)])
+    assert progress.call_count == 3
+
+
+def test_address_lookup_from_csv_string_iterable_with_workers(fixture_address_lookup: jpaddress.AddressLookup) -> None:
+    wd = os.path.dirname(__file__)
+    progress = MagicMock()
+    with open(os.path.join(wd, "fixtures", "zipcode.csv"), "r", encoding="utf-8") as fin:
+        actual = jpaddress.AddressLookup.from_csv_string_iterable(fin, workers=2, chunk_size=3, progress=progress)
+    assert actual == fixture_address_lookup
+    assert list(actual) == list(fixture_address_lookup)
+    progress.assert_has_calls([call(3), call(6), call(9), call(10)])
+
+
+def test_address_lookup_from_csv_string_iterable_memoizes_kana() -> None:
+    from jittok import jptext
+
+    jptext.clear_transliteration_cache()
+    wd = os.path.dirname(__file__)
+    with open(os.path.join(wd, "fixtures", "zipcode.csv"), "r", encoding="utf-8") as fin:
+        jpaddress.AddressLookup.from_csv_string_iterable(fin)
+    info = jptext.transliteration_cache_info()
+    assert info.misses == 12
+    assert info.hits == 18
+
+
+def test_address_is_compact_and_picklable() -> None:
+    import pickle
+
+    address = jpaddress.Address(
+        zipcode="0010000",
+        prefecture_kana="ホッカイドウ",
+        city_kana="サッポロシ",
+        town_kana="ミナミ",
+        prefecture_kanji="北海道",
+        city_kanji="札幌市",
+        town_kanji="南",
+        prefecture="北海道",
+        city="札幌市",
+        town="南",
+        prefecture_romaji="Hokkaido",
+        city_romaji="Sapporo-shi",
+        town_romaji="Minami",
+    )
+    assert not hasattr(address, "__dict__")
+    actual = pickle.loads(pickle.dumps(address))
+    assert actual == address
+    assert hash(actual) == hash(address)
+
+
+def test_address_lookup_from_csv_string_iterable_shares_repeated_names(
+    fixture_address_lookup: jpaddress.AddressLookup,
+) -> None:
+    a0 = fixture_address_lookup["0600000"]
+    a1 = fixture_address_lookup["0640941"]
+    assert a0.prefecture is a1.prefecture
+    assert a0.prefecture is a0.prefecture_kanji
+    assert a0.city is a1.city
+    assert a0.city_kana is a1.city_kana
+    assert a0.city_romaji is a1.city_romaji
+
+
+def test_address_lookup_from_csv_cached_remote_zipfile(mocker: MockerFixture) -> None:
+    fetch_cached_resource = mocker.patch("jittok.jpaddress.core.fetch_cached_resource")
+    from_csv_local_zipfile = mocker.patch("jittok.jpaddress.AddressLookup.from_csv_local_zipfile")
+    actual = jpaddress.AddressLookup.from_csv_cached_remote_zipfile(
+        "http://example.com/zipcode.zip", "zipcode.csv", encoding="CP932", cache_dir="/path/to/cache", offline=True
+    )
+    assert actual == from_csv_local_zipfile.return_value
+    fetch_cached_resource.assert_called_once_with("http://example.com/zipcode.zip", "/path/to/cache", offline=True)
+    from_csv_local_zipfile.assert_called_once_with(fetch_cached_resource.return_value, "zipcode.csv", encoding="CP932")
@@ -1,8 +1,16 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import Any, List, Optional, Tuple, Type
 
 import pytest
 
-from jittok.jpdatetime import strptime
+from jittok.jpdatetime import (
+    DateFormatter,
+    compile_format,
+    find_dates,
+    find_dates_stream,
+    strftime,
+    strptime,
+)
 
 
 @pytest.mark.parametrize(
@@ -19,9 +27,256 @@ from jittok.jpdatetime import strptime
         ("昭和元年", "%Y年", datetime(1926, 1, 1)),
         ("平成元年", "%Y年", datetime(1989, 1, 1)),
         ("令和元年", "%Y年", datetime(2019, 1, 1)),
+        ("2020-01- 5", "%Y-%m-%d", datetime(2020, 1, 5)),
+        ("1/ 1", "%m/%d", datetime(1900, 1, 1)),
     ],
 )
 def test_jpdatetime_strptime(datestring: str, formatstring: str, expected: datetime) -> None:
     """Test jpdatetime.strptime()"""
     actual = strptime(datestring, formatstring)
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    ["datestring", "formatstring", "expected"],
+    [
+        ("昭和561004", "%Y%m%d", datetime(1981, 10, 4)),
+        ("19/4/1", "%y/%m/%d", datetime(2019, 4, 1)),
+        ("99/4/1", "%y/%m/%d", datetime(1999, 4, 1)),
+        ("平成31-04-30t23:59:59.5", "%Y-%m-%dT%H:%M:%S.%f", datetime(2019, 4, 30, 23, 59, 59, 500000)),
+        ("令和元年 5月  1日", "%Y年 %m月 %d日", datetime(2019, 5, 1)),
+        ("100%令和2", "100%%%Y", datetime(2020, 1, 1)),
+        ("令和2年1月1日(Wed)", "%Y年%m月%d日(%a)", datetime(2020, 1, 1)),
+        ("令和2年 032日", "%Y年 %j日", datetime(2020, 2, 1)),
+    ],
+)
+def test_compile_format(datestring: str, formatstring: str, expected: datetime) -> None:
+    sut = compile_format(formatstring)
+    assert sut(datestring) == expected
+    assert sut(datestring) == strptime(datestring, formatstring)
+
+
+@pytest.mark.parametrize(
+    ["datestring", "formatstring", "expected"],
+    [
+        ("令和五年十二月三日", "%Y年%m月%d日", datetime(2023, 12, 3)),
+        ("令和５年１２月３日", "%Y年%m月%d日", datetime(2023, 12, 3)),
+        ("２０２３年１２月３日", "%Y年%m月%d日", datetime(2023, 12, 3)),
+        ("二〇二三年十月二十日", "%Y年%m月%d日", datetime(2023, 10, 20)),
+        ("千九百八十九年一月七日", "%Y年%m月%d日", datetime(1989, 1, 7)),
+        ("昭和六十四年一月七日", "%Y年%m月%d日", datetime(1989, 1, 7)),
+        ("平成三十一年四月三十日 二十三時五十九分〇秒", "%Y年%m月%d日 %H時%M分%S秒", datetime(2019, 4, 30, 23, 59)),
+        ("令和元年五月一日 ９時", "%Y年%m月%d日 %H時", datetime(2019, 5, 1, 9)),
+        ("令和五年十三月一日", "%Y年%m月%d日", None),
+        ("令和五年(Sun)", "%Y年(%a)", datetime(2023, 1, 1)),
+        ("令和５年(Sun)", "%Y年(%a)", datetime(2023, 1, 1)),
+    ],
+)
+def test_jpdatetime_strptime_parses_full_width_and_kanji_numerals(
+    datestring: str, formatstring: str, expected: Optional[datetime]
+) -> None:
+    if expected is None:
+        with pytest.raises(ValueError):
+            _ = strptime(datestring, formatstring)
+    else:
+        assert strptime(datestring, formatstring) == expected
+
+
+@pytest.mark.parametrize(
+    ["d", "formatstring"],
+    [
+        (datetime(2019, 5, 1), "%OEY%Om月%Od日"),
+        (datetime(1989, 1, 7), "%OEY%Om月%Od日"),
+        (datetime(2023, 12, 31, 23, 59, 58), "%OY年%Om月%Od日%OH時%OM分%OS秒"),
+    ],
+)
+def test_jpdatetime_strptime_parses_kanji_strftime(d: datetime, formatstring: str) -> None:
+    parseformat = formatstring.replace("%OEY", "%Y年").replace("%O", "%")
+    assert strptime(strftime(d, formatstring), parseformat) == d
+
+
+@pytest.mark.parametrize(
+    ["datestring", "formatstring"],
+    [
+        ("令和2年2月30日", "%Y年%m月%d日"),
+        ("令和2年1月1日 ", "%Y年%m月%d日"),
+        ("令和年1月1日", "%Y年%m月%d日"),
+        ("令和2年1月1日(Foo)", "%Y年%m月%d日(%a)"),
+        ("令和5年1月十十日", "%Y年%m月%d日"),
+        ("令和5年1月二二日", "%Y年%m月%d日"),
+        ("令和5年一二月1日", "%Y年%m月%d日"),
+        ("令和十十年1月1日", "%Y年%m月%d日"),
+        ("令和5年1月二十〇日", "%Y年%m月%d日"),
+        ("令和十十年(Sun)", "%Y年(%a)"),
+    ],
+)
+def test_compile_format_raises_value_error(datestring: str, formatstring: str) -> None:
+    with pytest.raises(ValueError):
+        _ = compile_format(formatstring)(datestring)
+
+
+def test_compile_format_is_cached() -> None:
+    assert compile_format("%Y年%m月%d日") is compile_format("%Y年%m月%d日")
+    assert compile_format("%Y年%m月%d日") is not compile_format("%Y/%m/%d")
+
+
+@pytest.mark.parametrize(["formatstring"], [["%Y年%m月%d日"], ["%Y年%m月%d日%%"]])
+@pytest.mark.parametrize(
+    ["errors", "expected"],
+    [
+        ["coerce", [datetime(2019, 4, 30), None, datetime(2019, 5, 1), None, datetime(2019, 4, 30)]],
+        ["ignore", [datetime(2019, 4, 30), "平成31年4月31日", datetime(2019, 5, 1), 20190501, datetime(2019, 4, 30)]],
+    ],
+)
+def test_date_parser_parse_many(formatstring: str, errors: str, expected: List[Any]) -> None:
+    sut = compile_format(formatstring)
+    suffix = "%" if formatstring.endswith("%%") else ""
+    values = [f"平成31年4月30日{suffix}", f"平成31年4月31日{suffix}", f"令和元年5月1日{suffix}", 20190501]
+    actual = sut.parse_many([*values, values[0]], errors=errors)
+    expected = [f"{e}{suffix}" if isinstance(e, str) else e for e in expected]
+    assert actual == expected
+
+
+@pytest.mark.parametrize(
+    ["values", "exception"],
+    [
+        [["令和元年5月1日", "令和元年5月32日"], ValueError],
+        [["令和元年5月1日", 20190501], TypeError],
+    ],
+)
+def test_date_parser_parse_many_raises(values: List[Any], exception: Type[Exception]) -> None:
+    with pytest.raises(exception):
+        _ = compile_format("%Y年%m月%d日").parse_many(values)
+    with pytest.raises(ValueError):
+        _ = compile_format("%Y年%m月%d日").parse_many(values[:1], errors="invalid")
+
+
+@pytest.mark.parametrize(
+    ["datestring", "formatstring", "expected"],
+    [
+        ("平成31年4月30日", "%Y年%m月%d日", datetime(2019, 4, 30)),
+        ("令和元年5月1日", "%Y年%m月%d日", datetime(2019, 5, 1)),
+        ("昭和64年1月7日", "%Y年%m月%d日", datetime(1989, 1, 7)),
+        ("平成31年4月", "%Y年%m月", datetime(2019, 4, 1)),
+        ("令和元年5月", "%Y年%m月", datetime(2019, 5, 1)),
+        ("大正元年", "%Y年", datetime(1912, 1, 1)),
+        ("2019年5月1日", "%Y年%m月%d日", datetime(2019, 5, 1)),
+        ("平成31年4月30日(Tue)", "%Y年%m月%d日(%a)", datetime(2019, 4, 30)),
+    ],
+)
+def test_jpdatetime_strptime_strict(datestring: str, formatstring: str, expected: datetime) -> None:
+    assert strptime(datestring, formatstring, strict=True) == expected
+
+
+@pytest.mark.parametrize(
+    ["datestring", "formatstring"],
+    [
+        ("平成31年5月1日", "%Y年%m月%d日"),
+        ("平成31年5月", "%Y年%m月"),
+        ("令和元年4月", "%Y年%m月"),
+        ("令和元年4月30日", "%Y年%m月%d日"),
+        ("昭和64年1月8日", "%Y年%m月%d日"),
+        ("明治元年1月1日", "%Y年%m月%d日"),
+        ("大正90年", "%Y年"),
+        ("平成0年", "%Y年"),
+        ("平成31年5月1日(Wed)", "%Y年%m月%d日(%a)"),
+    ],
+)
+def test_jpdatetime_strptime_strict_raises_value_error(datestring: str, formatstring: str) -> None:
+    assert strptime(datestring, formatstring) is not None
+    with pytest.raises(ValueError):
+        _ = strptime(datestring, formatstring, strict=True)
+
+
+@pytest.mark.parametrize(
+    ["d", "formatstring", "expected"],
+    [
+        (datetime(1912, 7, 29), "%EY%m月%d日", "明治45年07月29日"),
+        (datetime(1912, 7, 30), "%EY%m月%d日", "大正元年07月30日"),
+        (datetime(1926, 12, 24), "%EY%m月%d日", "大正15年12月24日"),
+        (datetime(1926, 12, 25), "%EY%m月%d日", "昭和元年12月25日"),
+        (datetime(1989, 1, 7, 23, 59, 59), "%EY%m月%d日", "昭和64年01月07日"),
+        (datetime(1989, 1, 8), "%EY%m月%d日", "平成元年01月08日"),
+        (datetime(2019, 4, 30), "%EC%Ey年", "平成31年"),
+        (datetime(2019, 5, 1), "%EC%Ey年", "令和1年"),
+        (datetime(2019, 5, 1), "%OEY", "令和元年"),
+        (datetime(2023, 12, 3, 15, 30, 45), "%OEY%Om月%Od日%OH時%OM分%OS秒", "令和五年十二月三日十五時三十分四十五秒"),
+        (datetime(2023, 10, 20, 0, 0, 0), "%EC%OEy年%Om月%Od日%OH時", "令和五年十月二十日〇時"),
+        (datetime(2023, 12, 3), "%OY年", "二〇二三年"),
+        (date(2023, 12, 3), "%Y-%m-%d %H %OH", "2023-12-03 00 〇"),
+        (datetime(2023, 12, 3), "100%% %EY %%EY %%", "100% 令和5年 %EY %"),
+        (datetime(1800, 1, 1), "%Y/%m/%d %Od", "1800/01/01 一"),
+    ],
+)
+def test_jpdatetime_strftime(d: date, formatstring: str, expected: str) -> None:
+    assert strftime(d, formatstring) == expected
+    assert DateFormatter(formatstring)(d) == expected
+
+
+@pytest.mark.parametrize(
+    ["d", "formatstring"],
+    [
+        (datetime(2023, 12, 3), "%Ez"),
+        (datetime(2023, 12, 3), "%Od%O"),
+        (datetime(2023, 12, 3), "%OEC"),
+        (datetime(1868, 1, 24), "%EY"),
+    ],
+)
+def test_jpdatetime_strftime_raises_value_error(d: date, formatstring: str) -> None:
+    with pytest.raises(ValueError):
+        _ = strftime(d, formatstring)
+
+
+def test_jpdatetime_strftime_matches_strptime() -> None:
+    d = datetime(1868, 1, 25)
+    while d.year < 2030:
+        assert strptime(strftime(d, "%EY%m月%d日"), "%Y年%m月%d日", strict=True) == d
+        d += timedelta(days=97)
+
+
+@pytest.mark.parametrize(
+    ["text", "expected"],
+    [
+        ("令和4年3月31日付", [((0, 9), datetime(2022, 3, 31))]),
+        ("2022/3/31", [((0, 9), datetime(2022, 3, 31))]),
+        ("R4.3.31", [((0, 7), datetime(2022, 3, 31))]),
+        ("（Ｈ３１．４．３０）", [((1, 9), datetime(2019, 4, 30))]),
+        ("平成三十一年四月一日", [((0, 10), datetime(2019, 4, 1))]),
+        ("二〇二二年三月三十一日", [((0, 11), datetime(2022, 3, 31))]),
+        ("令和　４年　３月　３１日", [((0, 12), datetime(2022, 3, 31))]),
+        ("M45.7.29とT1.7.30", [((0, 8), datetime(1912, 7, 29)), ((9, 16), datetime(1912, 7, 30))]),
+        ("S64-1-7、2022-03-31", [((0, 7), datetime(1989, 1, 7)), ((8, 18), datetime(2022, 3, 31))]),
+        ("令和元年5月1日", [((0, 8), datetime(2019, 5, 1))]),
+        ("平成31年5月1日", [((0, 9), datetime(2019, 5, 1))]),
+        ("12022/3/31", []),
+        ("2022/3/311", []),
+        ("2022-3/31", []),
+        ("HR4.3.31", []),
+        ("R4年3月31日", []),
+        ("2022年13月1日", []),
+        ("十二年三月一日", []),
+        ("2023年1月十十日", []),
+        ("2023年1月二二日", []),
+        ("第2022号", []),
+        ("", []),
+    ],
+)
+def test_find_dates(text: str, expected: List[Tuple[Tuple[int, int], datetime]]) -> None:
+    assert list(find_dates(text)) == expected
+    assert list(find_dates_stream(text)) == expected
+    assert list(find_dates_stream([text])) == expected
+
+
+def test_find_dates_strict() -> None:
+    text = "平成31年4月30日、平成31年5月1日、H31.5.1、2019/5/1"
+    assert [span for span, _ in find_dates(text, strict=True)] == [(0, 10), (29, 37)]
+    assert [span for span, _ in find_dates_stream([text], strict=True)] == [(0, 10), (29, 37)]
+
+
+@pytest.mark.parametrize(["chunk_size"], [[1], [2], [7], [64], [65], [1000]])
+def test_find_dates_stream_finds_dates_over_chunk_boundaries(chunk_size: int) -> None:
+    text = "受付：令和4年3月31日、回答：2022/4/1（R4.4.1）。" * 20 + "12022/3/31" + "x" * 100 + "令和4年3月3"
+    chunks = [text[i:][:chunk_size] for i in range(0, len(text), chunk_size)]
+    expected = list(find_dates(text))
+    assert len(expected) == 60
+    assert list(find_dates_stream(chunks)) == expected
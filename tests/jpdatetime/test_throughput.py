@@ -0,0 +1,53 @@
+import os
+import random
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, List
+
+import pytest
+
+from jittok import jptext
+from jittok.jpdatetime import compile_format, strftime, strptime
+
+_kanji_numeral_regex = re.compile("[〇一二三四五六七八九十百千]+")
+
+
+def _parse_after_normalizing(x: str) -> datetime:
+    x = jptext.normalize(x)
+    x = _kanji_numeral_regex.sub(lambda m: str(jptext.to_numeric(m[0])), x)
+    return strptime(x, "%Y年%m月%d日")
+
+
+def _sample_values(n: int) -> List[str]:
+    rng = random.Random(0)
+    full_width = str.maketrans("0123456789", "０１２３４５６７８９")
+    retval = []
+    for _ in range(n):
+        d = date(1990, 1, 1) + timedelta(days=rng.randint(0, 12000))
+        x = strftime(d, rng.choice(["%OEY%Om月%Od日", "%EY%m月%d日", "%Y年%m月%d日"]))
+        retval.append(x.translate(full_width) if rng.random() < 0.4 else x)
+    return retval
+
+
+def _best_of(n: int, values: List[str], parse: Callable[[str], datetime]) -> float:
+    retval = float("inf")
+    for _ in range(n):
+        start = time.perf_counter()
+        for x in values:
+            parse(x)
+        retval = min(retval, time.perf_counter() - start)
+    return retval
+
+
+def test_native_numerals_match_normalizing_first() -> None:
+    values = _sample_values(3000)
+    parser = compile_format("%Y年%m月%d日")
+    assert [parser(x) for x in values] == [_parse_after_normalizing(x) for x in values]
+
+
+@pytest.mark.skipif("JITTOK_BENCHMARK" not in os.environ, reason="set JITTOK_BENCHMARK to run benchmarks")
+def test_native_numerals_are_faster_than_normalizing_first() -> None:
+    values = _sample_values(3000)
+    parser = compile_format("%Y年%m月%d日")
+    assert _best_of(3, values, parser) < _best_of(3, values, _parse_after_normalizing)
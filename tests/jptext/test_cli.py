@@ -1,6 +1,9 @@
-from argparse import Namespace
-from unittest.mock import MagicMock
+from argparse import ArgumentParser, Namespace
+from io import BytesIO, StringIO, TextIOWrapper
+from typing import List
+from unittest.mock import MagicMock, call
 
+import pytest
 from pytest_mock import MockerFixture
 
 from jittok.jptext import cli
@@ -8,11 +11,79 @@ from jittok.jptext import cli
 
 def test_main_normalize(mocker: MockerFixture) -> None:
     sys = mocker.patch("jittok.jptext.cli.sys")
-    sys.stdin.read.return_value = "今日はｲｲ天気"
-    normalize = mocker.patch.object(cli, "normalize", return_value="正規化されたきれいな文字列")
+    decode_stream = mocker.patch.object(cli, "decode_stream", return_value=iter(["今日はｲｲ天気"]))
+    normalize_stream = mocker.patch.object(cli, "normalize_stream", return_value=iter(["正規化された", "きれいな文字列"]))
     args = MagicMock(spec=Namespace)
     args.subcommand = "jptext"
     args.subsubcommand = "normalize"
+    args.chunk_size = 1024
+    args.encoding = "auto"
+    args.newline_to_space = False
+    args.remove_multiple_spaces = True
+    args.remove_variation_selectors = False
+    args.jobs = 1
     cli.main(args)
-    sys.stdout.write.assert_called_once_with("正規化されたきれいな文字列")
-    normalize.assert_called_once_with("今日はｲｲ天気")
+    assert sys.stdout.write.call_args_list == [call("正規化された"), call("きれいな文字列")]
+    decode_stream.assert_called_once_with(sys.stdin.buffer, 1024, encoding=None)
+    normalize_stream.assert_called_once_with(
+        decode_stream.return_value,
+        newline_to_space=False,
+        remove_multiple_spaces=True,
+        remove_variation_selectors=False,
+        workers=1,
+    )
+
+
+@pytest.mark.parametrize(
+    ["argv", "stdin", "expected"],
+    [
+        [[], "ｶﾀｶﾅ（かっこ）\n  葛󠄀\n", "カタカナ (かっこ)\n  葛󠄀\n"],
+        [["--newline-to-space"], "ｶﾀｶﾅ（かっこ）\n  葛󠄀\n", "カタカナ (かっこ)   葛󠄀 "],
+        [["--remove-multiple-spaces"], "ｶﾀｶﾅ（かっこ）\n  葛󠄀\n", "カタカナ (かっこ)\n 葛󠄀\n"],
+        [["--remove-variation-selectors"], "ｶﾀｶﾅ（かっこ）\n  葛󠄀\n", "カタカナ (かっこ)\n  葛\n"],
+        [
+            ["--newline-to-space", "--remove-multiple-spaces", "--remove-variation-selectors", "--chunk-size", "3"],
+            "ｶﾀｶﾅ（かっこ）\n  葛󠄀\n",
+            "カタカナ (かっこ) 葛 ",
+        ],
+        [["--chunk-size", "1"], "ｶﾀｶﾅ（かっこ）\n", "カタカナ (かっこ)\n"],
+        [["--jobs", "2", "--chunk-size", "2"], "ｶﾀｶﾅ（かっこ）\n  葛󠄀\n" * 3, "カタカナ (かっこ)\n  葛󠄀\n" * 3],
+    ],
+)
+def test_normalize_streams_stdin_to_stdout(mocker: MockerFixture, argv: List[str], stdin: str, expected: str) -> None:
+    parser = ArgumentParser()
+    cli.setup_argument_subparser(parser)
+    args = parser.parse_args(["normalize", *argv])
+    stdout = StringIO()
+    mocker.patch("jittok.jptext.cli.sys.stdin", TextIOWrapper(BytesIO(stdin.encode("utf-8")), encoding="utf-8"))
+    mocker.patch("jittok.jptext.cli.sys.stdout", stdout)
+    cli.main(args)
+    assert stdout.getvalue() == expected
+
+
+@pytest.mark.parametrize(["argv"], [[["--encoding", "auto"]], [["--encoding", "euc_jp"]]])
+def test_normalize_decodes_stdin(mocker: MockerFixture, argv: List[str]) -> None:
+    parser = ArgumentParser()
+    cli.setup_argument_subparser(parser)
+    args = parser.parse_args(["normalize", "--chunk-size", "3", *argv])
+    stdout = StringIO()
+    stdin = MagicMock()
+    stdin.buffer = BytesIO("ｶﾀｶﾅ（かっこ）と漢字\n".encode("euc_jp"))
+    mocker.patch("jittok.jptext.cli.sys.stdin", stdin)
+    mocker.patch("jittok.jptext.cli.sys.stdout", stdout)
+    cli.main(args)
+    assert stdout.getvalue() == "カタカナ (かっこ) と漢字\n"
+
+
+@pytest.mark.parametrize(["text"], [["café résumé\n"], ["Ärger über Öl\n"]])
+def test_normalize_reads_utf_8_by_default(mocker: MockerFixture, text: str) -> None:
+    parser = ArgumentParser()
+    cli.setup_argument_subparser(parser)
+    args = parser.parse_args(["normalize"])
+    stdout = StringIO()
+    stdin = MagicMock()
+    stdin.buffer = BytesIO(text.encode("utf-8"))
+    mocker.patch("jittok.jptext.cli.sys.stdin", stdin)
+    mocker.patch("jittok.jptext.cli.sys.stdout", stdout)
+    cli.main(args)
+    assert stdout.getvalue() == text
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import pytest
+from pytest_mock import MockerFixture
+
+from jittok import jptext
+
+import_time_budget_us = 500_000
+
+
+def _import_times(module: str) -> Dict[str, int]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    retval = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            retval[name.strip()] = int(cumulative)
+    return retval
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="-X importtime requires Python 3.7 or later")
+@pytest.mark.parametrize(
+    ["module", "heavy_dependencies"],
+    [
+        ["jittok.jptext", ("pykakasi", "multiprocessing")],
+        ["jittok.jpaddress", ("pykakasi", "multiprocessing")],
+        ["jittok.jpdatetime", ("pykakasi", "multiprocessing", "regex", "jittok.jptext")],
+    ],
+)
+def test_import_does_not_load_heavy_dependencies(module: str, heavy_dependencies: Tuple[str, ...]) -> None:
+    actual = _import_times(module)
+    assert module in actual
+    assert not any(name == d or name.startswith(f"{d}.") for name in actual for d in heavy_dependencies)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="-X importtime requires Python 3.7 or later")
+@pytest.mark.skipif("JITTOK_BENCHMARK" not in os.environ, reason="set JITTOK_BENCHMARK to run benchmarks")
+@pytest.mark.parametrize(["module"], [["jittok.jptext"], ["jittok.jpaddress"], ["jittok.jpdatetime"]])
+def test_import_time_is_within_budget(module: str) -> None:
+    assert _import_times(module)[module] < import_time_budget_us
+
+
+def test_kakasi_is_created_once_on_first_use(mocker: MockerFixture) -> None:
+    mocker.patch("jittok.jptext.core._kakasi", None)
+
+    def slow_kakasi() -> object:
+        time.sleep(0.05)
+        return object()
+
+    kakasi = mocker.patch("pykakasi.kakasi", side_effect=slow_kakasi)
+    results: List[object] = []
+    threads = [threading.Thread(target=lambda: results.append(jptext.core._get_kakasi())) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    kakasi.assert_called_once_with()
+    assert len(results) == 4
+    assert all(r is results[0] for r in results)
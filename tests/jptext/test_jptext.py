@@ -1,7 +1,15 @@
+import codecs
+import io
+import itertools
+import math
 import os
-from typing import Union
+import unicodedata
+from decimal import Decimal
+from typing import Any, Callable, Generator, List, Type, Union
+from unittest.mock import call
 
 import pytest
+from pytest_mock import MockerFixture
 
 from jittok import jptext
 
@@ -78,6 +86,92 @@ def test_decode(original_codec: str) -> None:
     assert actual == expected
 
 
+@pytest.mark.parametrize(
+    ["original_codec", "expected"],
+    [
+        ["utf_8_sig", jptext.EncodingGuess("utf_8_sig", 1.0)],
+        ["utf_16", jptext.EncodingGuess("utf_16", 1.0)],
+        ["utf_32", jptext.EncodingGuess("utf_32", 1.0)],
+        ["utf_8", jptext.EncodingGuess("utf_8", 1.0)],
+        ["gbk", jptext.EncodingGuess("gbk", 1.0)],
+        ["euc_jp", jptext.EncodingGuess("euc_jp", 0.5)],
+    ],
+)
+def test_detect_encoding(original_codec: str, expected: jptext.EncodingGuess) -> None:
+    with open(os.path.join(fixture_root, f"{original_codec}.txt"), "rb") as fin:
+        somebin = fin.read()
+    assert jptext.detect_encoding(somebin) == expected
+
+
+def test_detect_encoding_returns_utf_8_for_ascii() -> None:
+    actual = jptext.detect_encoding(b"plain ascii text, 123\n")
+    assert actual.encoding == "utf_8"
+    assert 0.0 < actual.confidence <= 1.0
+
+
+@pytest.mark.parametrize(["text"], [["café résumé\n"], ["Ärger über Öl\n"], ["期待した値\n"]])
+def test_detect_encoding_prefers_utf_8(text: str) -> None:
+    actual = jptext.detect_encoding(text.encode("utf_8"))
+    assert actual == jptext.EncodingGuess("utf_8", 1.0)
+
+
+@pytest.mark.parametrize(["argument"], [[b""], [b"\x00\x01\x02\x03"]])
+def test_detect_encoding_raises_unknown_encoding_error(argument: bytes) -> None:
+    with pytest.raises(jptext.exceptions.UnknownEncodingError):
+        _ = jptext.detect_encoding(argument)
+
+
+def test_detect_encoding_only_decodes_sample() -> None:
+    somebin = "期待した値".encode("euc_jp") + b"\xff" * 100
+    assert jptext.detect_encoding(somebin, sample_size=7).encoding == "euc_jp"
+    with pytest.raises(jptext.exceptions.UnknownEncodingError):
+        _ = jptext.detect_encoding(somebin)
+
+
+@pytest.mark.parametrize(["original_codec"], [["utf_8"], ["utf_16"], ["euc_jp"], ["iso2022_jp"]])
+def test_decode_decodes_text_longer_than_sample(mocker: MockerFixture, original_codec: str) -> None:
+    mocker.patch("jittok.jptext.core.encoding_sample_size", 11)
+    getincrementaldecoder = mocker.spy(codecs, "getincrementaldecoder")
+    expected = "期待した値、期待した値\n" * 10
+    actual = jptext.decode(expected.encode(original_codec))
+    assert actual == expected
+    assert getincrementaldecoder.call_count <= len(jptext.core.codec_list) + 1
+
+
+@pytest.mark.parametrize(["original_codec"], [["utf_8"], ["utf_8_sig"], ["utf_16"], ["euc_jp"], ["iso2022_jp"]])
+@pytest.mark.parametrize(["chunk_size"], [[1], [5], [1 << 16]])
+def test_decode_stream(mocker: MockerFixture, original_codec: str, chunk_size: int) -> None:
+    mocker.patch("jittok.jptext.core.encoding_sample_size", 11)
+    expected = "期待した値、期待した値\n" * 10
+    actual = list(jptext.decode_stream(io.BytesIO(expected.encode(original_codec)), chunk_size))
+    assert "".join(actual) == expected
+    assert len(actual) > 1
+
+
+def test_decode_stream_accepts_encoding() -> None:
+    actual = jptext.decode_stream(io.BytesIO("期待した値".encode("gbk")), encoding="gbk")
+    assert "".join(actual) == "期待した値"
+
+
+def test_decode_stream_yields_nothing_for_empty_stream() -> None:
+    assert list(jptext.decode_stream(io.BytesIO(b""))) == []
+
+
+@pytest.mark.parametrize(
+    ["chunks", "expected"],
+    [
+        [[], []],
+        [["a\nb\r\nc\rd"], ["a\n", "b\r\n", "c\r", "d"]],
+        [["a", "b\r", "\nc", "\n"], ["ab\r\n", "c\n"]],
+        [["a\r", "", "b"], ["a\r", "b"]],
+        [["a\r"], ["a\r"]],
+        [['"x\ny"', ",z\n"], ['"x\n', 'y",z\n']],
+    ],
+)
+def test_split_lines(chunks: List[str], expected: List[str]) -> None:
+    assert list(jptext.split_lines(chunks)) == expected
+
+
 @pytest.mark.parametrize(
     ["argument", "expected"],
     [
@@ -126,6 +220,10 @@ def test_decode(original_codec: str) -> None:
         ("15無量大数", 1500000000000000000000000000000000000000000000000000000000000000000000),
         ("1京2858兆0519億6763万3865", 12858051967633865),
         ("一1１", 111),
+        (".5", 0.5),
+        ("千万", 10000000),
+        ("-.5千", -500),
+        ("12345678901234567890", 12345678901234567890),
     ],
 )
 def test_to_numeric(argument: str, expected: Union[float, int]) -> None:
@@ -133,6 +231,70 @@ def test_to_numeric(argument: str, expected: Union[float, int]) -> None:
     assert actual - expected == 0.0
 
 
+@pytest.mark.parametrize(
+    ["argument", "expected"],
+    [
+        ["123", 123],
+        ["1.0", 1],
+        ["-1,234.50", Decimal("-1234.50")],
+        ["1.1億", 110000000],
+        ["2.3万3十", 23030],
+        ["0.1万0.01", Decimal("1000.01")],
+        ["-.5千", -500],
+        ["1.23456789012345678901234567891無量大数", 123456789012345678901234567891 * 10**39],
+        ["1京2858兆0519億6763万3865.5", Decimal("12858051967633865.5")],
+        ["三千一", 3001],
+    ],
+)
+def test_to_numeric_exact(argument: str, expected: Union[int, Decimal]) -> None:
+    actual = jptext.to_numeric(argument, exact=True)
+    assert type(actual) is type(expected)
+    assert actual == expected
+    assert str(actual) == str(expected)
+
+
+@pytest.mark.parametrize(
+    ["text", "expected"],
+    [
+        ["", []],
+        ["数字なし", []],
+        ["合計３億５千万円（税込）", [((2, 7), 350000000)]],
+        ["単価1,200.5円、数量十二個", [((2, 9), 1200.5), ((13, 15), 12)]],
+        ["気温は-3.5度", [((3, 7), -3.5)]],
+        ["2020-10-01", [((0, 4), 2020), ((5, 7), 10), ((8, 10), 1)]],
+        ["二千三千", [((0, 3), 2003), ((3, 4), 1000)]],
+        ["1,2,3", [((0, 1), 1), ((2, 3), 2), ((4, 5), 3)]],
+        ["終わり1.", [((3, 4), 1)]],
+        ["万1", [((1, 2), 1)]],
+        ["正しい", []],
+        ["1京2858兆0519億6763万3865", [((0, 21), 12858051967633865)]],
+    ],
+)
+def test_find_numerics(text: str, expected: List[Any]) -> None:
+    assert list(jptext.find_numerics(text)) == expected
+
+
+def test_find_numerics_exact() -> None:
+    assert list(jptext.find_numerics("約1.1億円と0.1万0.01円", exact=True)) == [
+        ((1, 5), 110000000),
+        ((7, 15), Decimal("1000.01")),
+    ]
+
+
+def test_find_numerics_spans_are_numerics() -> None:
+    import random
+
+    alphabet = list("0129１一二〇零,.-千百十万億兆京x日 正不") + ["無量大数", "恒河沙", "123", "1,234", ",000"]
+    rng = random.Random(0)
+    for _ in range(3000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        end = 0
+        for (start, stop), value in jptext.find_numerics(text):
+            assert end <= start < stop
+            assert jptext.to_numeric(text[start:stop]) == value
+            end = stop
+
+
 @pytest.mark.parametrize(
     ["argument"],
     [
@@ -147,6 +309,14 @@ def test_to_numeric(argument: str, expected: Union[float, int]) -> None:
         ["1,2,3"],
         ["123,23"],
         ["1111,324"],
+        ["-"],
+        ["1."],
+        ["--1"],
+        ["1-"],
+        ["千千"],
+        ["百千"],
+        ["1,23千"],
+        ["万億"],
     ],
 )
 def test_to_numeric_raises_value_error(argument: str) -> None:
@@ -163,6 +333,47 @@ def test_to_numeric_raises_type_error(argument: str) -> None:
         _ = jptext.to_numeric(argument)
 
 
+@pytest.mark.parametrize(
+    ["errors", "expected"],
+    [
+        ["coerce", [1234, 123, 350000000, None, 1234, None, -20]],
+        ["ignore", [1234, 123, 350000000, "十日", 1234, None, -20]],
+    ],
+)
+def test_to_numeric_many(errors: str, expected: List[Any]) -> None:
+    actual = jptext.to_numeric_many(["1,234", "１２３", "3億5千万", "十日", "1,234", None, "-2十"], errors=errors)
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        if e is None and errors == "coerce":
+            assert math.isnan(a)
+        else:
+            assert a == e
+
+
+def test_to_numeric_many_parses_each_distinct_value_once(mocker: MockerFixture) -> None:
+    parse_numeric = mocker.patch("jittok.jptext.core._parse_numeric", side_effect=[1, None])
+    actual = jptext.to_numeric_many(["1", "x", "1", "x", "1"], errors="ignore")
+    assert actual == [1, "x", 1, "x", 1]
+    assert parse_numeric.call_args_list == [call("1", False), call("x", False)]
+
+
+@pytest.mark.parametrize(
+    ["values", "exception"],
+    [
+        [["1", "invalid"], ValueError],
+        [["1", 2], TypeError],
+    ],
+)
+def test_to_numeric_many_raises(values: List[Any], exception: Type[Exception]) -> None:
+    with pytest.raises(exception):
+        _ = jptext.to_numeric_many(values)
+
+
+def test_to_numeric_many_raises_value_error_on_invalid_errors() -> None:
+    with pytest.raises(ValueError):
+        _ = jptext.to_numeric_many(["1"], errors="invalid")
+
+
 @pytest.mark.parametrize(
     ["raw", "expected"],
     [
@@ -260,3 +471,231 @@ def test_kanji_to_hiragana(raw: str, expected: str) -> None:
 def test_kanji_to_romaji(raw: str, expected: str) -> None:
     actual = jptext.kanji_to_romaji(raw)
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    ["sut", "original"],
+    [
+        [jptext.cached_kanji_to_kana, jptext.kanji_to_kana],
+        [jptext.cached_kanji_to_hiragana, jptext.kanji_to_hiragana],
+        [jptext.cached_kanji_to_romaji, jptext.kanji_to_romaji],
+    ],
+)
+def test_cached_kanji_to_x(sut: Callable[[str], str], original: Callable[[str], str]) -> None:
+    jptext.clear_transliteration_cache()
+    assert sut("カナ漢字混じり") == original("カナ漢字混じり")
+    assert sut("カナ漢字混じり") == original("カナ漢字混じり")
+    assert sut("漢字") == original("漢字")
+    info = jptext.transliteration_cache_info()
+    assert info.hits == 1
+    assert info.misses == 2
+    assert info.currsize == 2
+    assert info.maxsize == jptext.core.transliteration_cache_size
+
+
+def test_cached_kanji_to_x_shares_the_cache_of_transliterate() -> None:
+    jptext.clear_transliteration_cache()
+    kana, hira, romaji = jptext.transliterate("漢字")
+    assert jptext.cached_kanji_to_kana("漢字") == kana
+    assert jptext.cached_kanji_to_hiragana("漢字") == hira
+    assert jptext.cached_kanji_to_romaji("漢字") == romaji
+    info = jptext.transliteration_cache_info()
+    assert info.hits == 3
+    assert info.misses == 1
+
+
+def test_set_transliteration_cache_size() -> None:
+    try:
+        jptext.set_transliteration_cache_size(1)
+        jptext.transliterate("東京")
+        jptext.transliterate("大阪")
+        jptext.transliterate("東京")
+        info = jptext.transliteration_cache_info()
+        assert info.maxsize == 1
+        assert info.misses == 3
+    finally:
+        jptext.set_transliteration_cache_size(8192)
+    assert jptext.transliteration_cache_info().maxsize == 8192
+
+
+def test_transliterate_converts_once(mocker: MockerFixture) -> None:
+    jptext.clear_transliteration_cache()
+    convert = mocker.spy(jptext.core._get_kakasi(), "convert")
+    actual = jptext.transliterate("カナ漢字混じり")
+    assert actual == (
+        jptext.kanji_to_kana("カナ漢字混じり"),
+        jptext.kanji_to_hiragana("カナ漢字混じり"),
+        jptext.kanji_to_romaji("カナ漢字混じり"),
+    )
+    assert convert.call_count == 4
+    assert jptext.transliterate("カナ漢字混じり", targets=("hepburn", "orig")) == (actual[2], "カナ漢字混じり")
+    assert convert.call_count == 4
+    info = jptext.transliteration_cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.maxsize == jptext.core.transliteration_cache_size
+
+
+def test_transliterate_many() -> None:
+    jptext.clear_transliteration_cache()
+    actual = jptext.transliterate_many(["東京", "大阪", "東京", "大阪"], targets=("kana", "passport"))
+    assert actual == [("トウキョウ", "tokyou"), ("オオサカ", "osaka"), ("トウキョウ", "tokyou"), ("オオサカ", "osaka")]
+    assert jptext.transliteration_cache_info().misses == 2
+
+
+def test_transliterate_raises_value_error_on_unknown_target() -> None:
+    with pytest.raises(ValueError):
+        _ = jptext.transliterate("東京", targets=("kana", "katakana"))
+    with pytest.raises(ValueError):
+        _ = jptext.transliterate_many(["東京"], targets=("romaji",))
+
+
+def _reference_normalize(
+    x: str, newline_to_space: bool, remove_multiple_spaces: bool, remove_variation_selectors: bool
+) -> str:
+    import re
+    import unicodedata
+
+    from jittok.jptext.core import normalize_trans_map
+
+    normalized_string = unicodedata.normalize("NFKC", x).translate(normalize_trans_map)
+    normalized_string = re.sub(r"\)([^\s)])", r") \1", re.sub(r"([^\s(])\(", r"\1 (", normalized_string))
+    if newline_to_space:
+        normalized_string = re.sub(r"[\n\r]", " ", normalized_string)
+    if remove_multiple_spaces:
+        normalized_string = re.sub(r" +", " ", normalized_string)
+    if remove_variation_selectors:
+        normalized_string = re.sub(r"[\U000e0100-\U000e01ef]", "", normalized_string)
+    return normalized_string
+
+
+@pytest.mark.parametrize(["newline_to_space"], [[False], [True]])
+@pytest.mark.parametrize(["remove_multiple_spaces"], [[False], [True]])
+@pytest.mark.parametrize(["remove_variation_selectors"], [[False], [True]])
+def test_normalizer_is_identical_to_normalize(
+    newline_to_space: bool, remove_multiple_spaces: bool, remove_variation_selectors: bool
+) -> None:
+    import random
+
+    alphabet = ["(", ")", "（", "）", " ", "  ", "　", "\t", "\n", "\r", "a", "ｱ", "ﾞ", "葛", "\U000e0100", "x"]
+    rng = random.Random(0)
+    sut = jptext.Normalizer(newline_to_space, remove_multiple_spaces, remove_variation_selectors)
+    for _ in range(2000):
+        raw = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        expected = _reference_normalize(raw, newline_to_space, remove_multiple_spaces, remove_variation_selectors)
+        assert sut(raw) == expected
+        assert jptext.normalize(raw, newline_to_space, remove_multiple_spaces, remove_variation_selectors) == expected
+
+
+def test_get_normalizer_returns_shared_instance() -> None:
+    assert jptext.get_normalizer(True, False, True) is jptext.get_normalizer(True, False, True)
+    assert jptext.get_normalizer(True, False, True) is not jptext.get_normalizer(False, False, True)
+
+
+@pytest.mark.parametrize(["newline_to_space"], [[False], [True]])
+@pytest.mark.parametrize(["remove_multiple_spaces"], [[False], [True]])
+@pytest.mark.parametrize(["remove_variation_selectors"], [[False], [True]])
+def test_normalize_stream_is_identical_to_normalize(
+    newline_to_space: bool, remove_multiple_spaces: bool, remove_variation_selectors: bool
+) -> None:
+    import random
+
+    alphabet = [
+        "(",
+        ")",
+        "（",
+        "）",
+        " ",
+        "　",
+        "\t",
+        "\n",
+        "\r\n",
+        "a",
+        "1",
+        "か",
+        "ス",
+        "゙",
+        "ｶ",
+        "ﾞ",
+        "葛",
+        "\U000e0100",
+        "¨",
+        "가",
+        "ᆨ",
+    ]
+    rng = random.Random(0)
+    for _ in range(1000):
+        raw = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        cuts = sorted(rng.randint(0, len(raw)) for _ in range(rng.randint(0, 8)))
+        chunks = [raw[i:j] for i, j in zip([0] + cuts, cuts + [len(raw)])]
+        expected = jptext.normalize(raw, newline_to_space, remove_multiple_spaces, remove_variation_selectors)
+        actual = jptext.normalize_stream(chunks, newline_to_space, remove_multiple_spaces, remove_variation_selectors)
+        assert "".join(actual) == expected
+
+
+def test_normalize_stream_yields_incrementally() -> None:
+    chunks = iter(["一行目（いちぎょうめ）\n", "二行目\n", "三行目"])
+    sut = jptext.normalize_stream(chunks)
+    assert next(sut) == "一行目 (いちぎょうめ)\n"
+    assert next(chunks) == "二行目\n"
+
+
+@pytest.mark.parametrize("newline_to_space", [False, True])
+@pytest.mark.parametrize(
+    "text",
+    [
+        "ｱｲｳ、ＡＢＣ。ｶﾞｷﾞ",
+        unicodedata.normalize("NFD", "각"),
+        "\u0cc6\u0cc2\u0cd5",
+    ],
+)
+def test_normalize_stream_cuts_long_lines(mocker: MockerFixture, newline_to_space: bool, text: str) -> None:
+    mocker.patch("jittok.jptext.core.stream_block_max_length", 1000)
+    chunk = text * 100
+    blocks = list(jptext.core._independent_blocks([chunk] * 100, newline_to_space))
+    assert len(blocks) > 1
+    assert all(len(block) <= 1000 + len(chunk) for block in blocks)
+    actual = jptext.normalize_stream([chunk] * 100, newline_to_space)
+    assert "".join(actual) == jptext.normalize(chunk * 100, newline_to_space)
+
+
+@pytest.mark.parametrize(
+    ["x", "expected"],
+    [
+        ["ｱｲ", True],
+        ["Ｃ。", True],
+        ["ｶﾞ", False],
+        ["か\u3099", False],
+        ["Ａ（", False],
+        ["　Ａ", False],
+        ["\u1100\u1161", False],
+        ["\u1100\u1161\u11a8", False],
+        ["\u11a8\u1100", True],
+        ["\u0cc6\u0cc2\u0cd5", False],
+    ],
+)
+def test_is_fallback_boundary(x: str, expected: bool) -> None:
+    assert jptext.core._is_fallback_boundary(x, len(x) - 1) is expected
+
+
+@pytest.mark.parametrize(["newline_to_space", "remove_multiple_spaces"], [[False, False], [True, True]])
+def test_normalize_stream_with_workers_keeps_order(newline_to_space: bool, remove_multiple_spaces: bool) -> None:
+    raw = "".join(f"{i}行目（ｷﾞｮｳ）  葛󠄀\n" for i in range(200))
+    chunks = [raw[i : i + 7] for i in range(0, len(raw), 7)]  # noqa: E203
+    actual = jptext.normalize_stream(chunks, newline_to_space, remove_multiple_spaces, workers=2)
+    assert "".join(actual) == jptext.normalize(raw, newline_to_space, remove_multiple_spaces)
+
+
+def test_normalize_stream_with_workers_bounds_chunks_in_flight() -> None:
+    consumed = 0
+
+    def chunks() -> Generator[str, None, None]:
+        nonlocal consumed
+        while True:
+            consumed += 1
+            yield "ｶﾀｶﾅ\n"
+
+    sut = jptext.normalize_stream(chunks(), workers=2)
+    assert list(itertools.islice(sut, 3)) == ["カタカナ\n"] * 3
+    sut.close()
+    assert consumed <= 3 + 2 * 2 + 1
@@ -1,4 +1,7 @@
+import itertools
+
 from jittok import Callable as jCallable
+from jittok.core import map_in_processes
 
 
 class ConcreteCallable(jCallable[int, str]):
@@ -9,3 +12,13 @@ class ConcreteCallable(jCallable[int, str]):
 def test_jittok_callable_is_callable() -> None:
     sut = ConcreteCallable()
     assert callable(sut)
+
+
+def test_map_in_processes_keeps_order() -> None:
+    assert list(map_in_processes(str, range(20), 2)) == [str(i) for i in range(20)]
+
+
+def test_map_in_processes_bounds_items_in_flight() -> None:
+    sut = map_in_processes(abs, itertools.count(), 2)
+    assert list(itertools.islice(sut, 3)) == [0, 1, 2]
+    sut.close()